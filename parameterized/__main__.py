@@ -0,0 +1,39 @@
+""" Command line tools for ``parameterized``::
+
+        $ python -m parameterized clear-cache
+"""
+
+import sys
+import argparse
+
+from .parameterized import clear_cache, get_cache_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m parameterized")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    clear = commands.add_parser(
+        "clear-cache",
+        help="remove the cached input tables and test results",
+    )
+    clear.add_argument(
+        "--cache-dir", default=None,
+        help="the cache directory (default: $PARAMETERIZED_CACHE_DIR, or "
+        ".parameterized_cache)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "clear-cache":
+        cache_dir = args.cache_dir or get_cache_dir()
+        if clear_cache(cache_dir):
+            print("Removed %s" %(cache_dir, ))
+        else:
+            print("%s does not exist" %(cache_dir, ))
+        return 0
+
+    parser.print_help()
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,496 @@
+""" Benchmarks for the overhead of ``parameterized``: how long it takes to
+    decorate tests and to generate their names and docstrings, how long test
+    runners take to collect the generated tests, and how much memory each row
+    uses.
+
+    Results are written as JSON, so they can be compared across releases::
+
+        $ python -m parameterized.benchmark
+        $ python -m parameterized.benchmark --sizes 10,1000 --output bench.json
+        $ python -m parameterized.benchmark --benchmarks collect_unittest
+
+    Benchmarks which need an optional dependency (``collect_pytest`` needs
+    py.test) are skipped when it isn't installed.
+"""
+
+import os
+import re
+import sys
+import time
+import json
+import types
+import inspect
+import argparse
+import platform
+import tempfile
+import unittest
+import contextlib
+import tracemalloc
+from collections import namedtuple, OrderedDict
+
+from . import __version__
+from .parameterized import (
+    param, parameterized, parameterized_class, default_name_func,
+    default_doc_func, reapply_patches_if_need, PatchTemplate,
+)
+
+
+_legacy_param = namedtuple("param", "args kwargs")
+
+class LegacyParam(_legacy_param):
+    """ The original ``param`` representation, kept here as a baseline: it
+        has an instance ``__dict__``, each row allocates its own empty
+        ``kwargs``, and ``from_decorator`` copies the row's tuple. """
+
+    def __new__(cls, *args, **kwargs):
+        return _legacy_param.__new__(cls, args, kwargs)
+
+    @classmethod
+    def from_decorator(cls, args):
+        if isinstance(args, cls):
+            return args
+        return cls(*args)
+
+
+class BenchmarkSkipped(Exception):
+    pass
+
+
+def make_rows(size):
+    return [("row %s" %(i, ), i) for i in range(size)]
+
+
+def test_func(self, name, value):
+    """ Benchmark test. """
+
+# Don't let test runners collect the benchmark's test function.
+test_func.__test__ = False
+
+
+@contextlib.contextmanager
+def temporary_module(name="parameterized_benchmark_tmp"):
+    """ A throwaway module for benchmarks which inject tests into the module
+        their test class is defined in. """
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    try:
+        yield module
+    finally:
+        del sys.modules[name]
+
+
+def measure_time(func, repeat, setup=None):
+    """ Returns the fastest of ``repeat`` calls to ``func()``, in seconds. If
+        ``setup`` is provided, ``func(setup())`` is timed instead (without
+        the call to ``setup()``). """
+    best = None
+    for _ in range(repeat):
+        args = (setup(), ) if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def measure_memory(func):
+    """ Returns the number of bytes allocated by ``func()`` which are still
+        alive after it returns (ie, the size of its result). """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = func()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def bench_param_memory(size, repeat):
+    rows = make_rows(size)
+    legacy = measure_memory(lambda: [LegacyParam.from_decorator(r) for r in rows])
+    current = measure_memory(lambda: [param.from_decorator(r) for r in rows])
+    return {
+        "legacy_bytes_per_row": legacy / float(size),
+        "bytes_per_row": current / float(size),
+    }
+
+
+def bench_expand_memory(size, repeat):
+    rows = make_rows(size)
+
+    def expand(lazy):
+        namespace = {}
+        parameterized.expand(rows, namespace=namespace, lazy=lazy)(test_func)
+        return namespace
+
+    return {
+        "bytes_per_row": measure_memory(lambda: expand(False)) / float(size),
+        "lazy_bytes_per_row": measure_memory(lambda: expand(True)) / float(size),
+    }
+
+
+def bench_decorate_parameterized(size, repeat):
+    rows = make_rows(size)
+    seconds = measure_time(lambda: parameterized(rows)(lambda name, value: None), repeat)
+    return {
+        "seconds": seconds,
+        "seconds_per_row": seconds / size,
+    }
+
+
+def bench_decorate_expand(size, repeat):
+    rows = make_rows(size)
+    seconds = measure_time(
+        lambda: parameterized.expand(rows, namespace={})(test_func),
+        repeat,
+    )
+    lazy_seconds = measure_time(
+        lambda: parameterized.expand(rows, namespace={}, lazy=True)(test_func),
+        repeat,
+    )
+    return {
+        "seconds": seconds,
+        "seconds_per_row": seconds / size,
+        "lazy_seconds": lazy_seconds,
+        "lazy_seconds_per_row": lazy_seconds / size,
+    }
+
+
+def bench_expand_with_patches(size, repeat):
+    """ Times and measures applying five ``mock.patch`` decorators to each
+        test case of an expansion, which ``parameterized.expand`` does with a
+        ``PatchTemplate``, against re-applying every patch to each test case
+        (with ``reapply_patches_if_need``). The time to expand the test is
+        included for reference. """
+    try:
+        from unittest import mock
+    except ImportError:
+        import mock
+
+    func = test_func
+    for name in ["getpid", "getcwd", "getppid", "getuid", "getgid"]:
+        func = mock.patch("os." + name)(func)
+    patchings = list(func.patchings)
+    template = PatchTemplate(func, patchings)
+
+    def patch():
+        return [template.patched_func(template.new_patchings()) for _ in range(size)]
+
+    def legacy_patch():
+        return [reapply_patches_if_need(func) for _ in range(size)]
+
+    def restore_patchings():
+        # parameterized.expand removes the patches from the test it expands.
+        func.patchings[:] = patchings
+
+    rows = make_rows(size)
+    expand_seconds = measure_time(
+        lambda _: parameterized.expand(rows, namespace={})(func),
+        repeat,
+        setup=restore_patchings,
+    )
+    restore_patchings()
+    return {
+        "seconds_per_row": measure_time(patch, repeat) / size,
+        "legacy_seconds_per_row": measure_time(legacy_patch, repeat) / size,
+        "bytes_per_row": measure_memory(patch) / float(size),
+        "legacy_bytes_per_row": measure_memory(legacy_patch) / float(size),
+        "expand_seconds_per_row": expand_seconds / size,
+    }
+
+
+def bench_decorate_parameterized_class(size, repeat):
+    input_dicts = [{"name": "row %s" %(i, ), "value": i} for i in range(size)]
+
+    def decorate():
+        with temporary_module() as module:
+            base = type("TestBenchmark", (unittest.TestCase, ), {
+                "__module__": module.__name__,
+                "test_method": lambda self: None,
+            })
+            parameterized_class(input_dicts)(base)
+
+    seconds = measure_time(decorate, repeat)
+    return {
+        "seconds": seconds,
+        "seconds_per_class": seconds / size,
+    }
+
+
+def bench_stack_inspection(size, repeat):
+    """ Times applying ``@parameterized`` to standalone functions and to
+        methods in a class body, which is where the decorator inspects the
+        stack. ``inspect.stack()`` is timed from the same depth for
+        reference. """
+    rows = [(i, ) for i in range(10)]
+    number = min(size, 1000)
+
+    def decorate_function():
+        parameterized(rows)(lambda x: None)
+
+    def decorate_method():
+        class TestDecoration(object):
+            parameterized(rows)(lambda self, x: None)
+
+    def call_inspect_stack():
+        class TestInspectStack(object):
+            inspect.stack()
+
+    def per_call(func):
+        return measure_time(lambda: [func() for _ in range(number)], repeat) / number
+
+    return {
+        "function_seconds_per_test": per_call(decorate_function),
+        "method_seconds_per_test": per_call(decorate_method),
+        "inspect_stack_seconds": per_call(call_inspect_stack),
+    }
+
+
+def bench_names_and_docs(size, repeat):
+    params = [param.from_decorator(r) for r in make_rows(size)]
+    digits = len(str(size - 1))
+
+    def names():
+        for num, p in enumerate(params):
+            default_name_func(test_func, str(num).zfill(digits), p)
+
+    def docs():
+        for num, p in enumerate(params):
+            default_doc_func(test_func, num, p)
+
+    name_seconds = measure_time(names, repeat)
+    doc_seconds = measure_time(docs, repeat)
+    return {
+        "name_seconds_per_row": name_seconds / size,
+        "doc_seconds_per_row": doc_seconds / size,
+    }
+
+
+def legacy_to_safe_name(s):
+    """ The original ``parameterized.to_safe_name``, kept as a baseline. """
+    return str(re.sub("[^a-zA-Z0-9_]+", "_", str(s)))
+
+
+def batch_name_func(func, nums, params):
+    """ Generates the same names as ``default_name_func``, all at once. """
+    prefix = func.__name__ + "_"
+    to_safe_name = parameterized.to_safe_name
+    names = []
+    for num, p in zip(nums, params):
+        if p.args and isinstance(p.args[0], str):
+            names.append(prefix + num + "_" + to_safe_name(p.args[0]))
+        else:
+            names.append(prefix + num)
+    return names
+
+
+def bench_naming(size, repeat):
+    """ Times naming the test cases of an expansion with a ``name_func``
+        (called for each row) and with a ``batch_name_func`` (called once),
+        and times ``to_safe_name`` on first arguments which repeat (as they
+        often do) against the original, uncached, implementation. """
+    params = [param.from_decorator(r) for r in make_rows(size)]
+    digits = len(str(size - 1))
+    nums = [str(num).zfill(digits) for num in range(size)]
+    assert batch_name_func(test_func, nums, params) == [
+        default_name_func(test_func, num, p) for (num, p) in zip(nums, params)
+    ]
+    name_func_seconds = measure_time(
+        lambda: [default_name_func(test_func, num, p) for (num, p) in zip(nums, params)],
+        repeat,
+    )
+    batch_name_func_seconds = measure_time(
+        lambda: batch_name_func(test_func, nums, params),
+        repeat,
+    )
+
+    first_args = ["case %s: %s" %(i % 100, "x" * 20) for i in range(size)]
+    legacy_seconds = measure_time(
+        lambda: [legacy_to_safe_name(s) for s in first_args],
+        repeat,
+    )
+    to_safe_name = parameterized.to_safe_name
+    seconds = measure_time(lambda: [to_safe_name(s) for s in first_args], repeat)
+    return {
+        "name_func_seconds_per_row": name_func_seconds / size,
+        "batch_name_func_seconds_per_row": batch_name_func_seconds / size,
+        "legacy_to_safe_name_seconds_per_row": legacy_seconds / size,
+        "to_safe_name_seconds_per_row": seconds / size,
+    }
+
+
+def bench_collect_generator(size, repeat):
+    """ Times iterating over the test generator created by ``@parameterized``,
+        the way nose (and old versions of py.test) collect its tests. """
+    wrapper = parameterized(make_rows(size))(lambda name, value: None)
+    seconds = measure_time(lambda: list(wrapper()), repeat)
+    return {
+        "seconds": seconds,
+        "seconds_per_row": seconds / size,
+    }
+
+
+def bench_collect_unittest(size, repeat):
+    rows = make_rows(size)
+    loader = unittest.TestLoader()
+    results = OrderedDict()
+    for lazy in [False, True]:
+        # A new class is created for each repetition, so lazily expanded
+        # tests are built by every load.
+        def make_test_class():
+            namespace = {"__module__": __name__}
+            parameterized.expand(rows, namespace=namespace, lazy=lazy)(test_func)
+            return type("TestBenchmark", (unittest.TestCase, ), namespace)
+
+        suites = []
+        seconds = measure_time(
+            lambda test_class: suites.append(loader.loadTestsFromTestCase(test_class)),
+            repeat,
+            setup=make_test_class,
+        )
+        assert suites[-1].countTestCases() == size
+        prefix = "lazy_" if lazy else ""
+        results[prefix + "seconds"] = seconds
+        results[prefix + "seconds_per_row"] = seconds / size
+    return results
+
+
+PYTEST_MODULE_TEMPLATE = """
+from unittest import TestCase
+from parameterized import parameterized
+
+class TestBenchmark(TestCase):
+    @parameterized.expand([("row %%s" %%(i, ), i) for i in range(%(size)s)])
+    def test_method(self, name, value):
+        pass
+"""
+
+
+def bench_collect_pytest(size, repeat):
+    """ Times ``py.test --collect-only`` (in process, so interpreter start up
+        isn't included) on a module with one expanded test. """
+    try:
+        import pytest
+    except ImportError:
+        raise BenchmarkSkipped("py.test is not installed")
+
+    class CountCollected(object):
+        count = None
+
+        def pytest_collection_finish(self, session):
+            self.count = len(session.items)
+
+    module_name = "test_parameterized_benchmark_%s" %(size, )
+    tmpdir = tempfile.mkdtemp(prefix="parameterized-benchmark-")
+    path = os.path.join(tmpdir, module_name + ".py")
+    with open(path, "w") as f:
+        f.write(PYTEST_MODULE_TEMPLATE %{"size": size})
+
+    counter = CountCollected()
+    args = ["--collect-only", "-q", "-p", "no:cacheprovider", "--rootdir", tmpdir, path]
+
+    def collect():
+        sys.modules.pop(module_name, None)
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                pytest.main(args, plugins=[counter])
+
+    try:
+        seconds = measure_time(collect, repeat)
+    finally:
+        sys.modules.pop(module_name, None)
+        os.unlink(path)
+        os.rmdir(tmpdir)
+    if counter.count != size:
+        raise AssertionError(
+            "py.test collected %s tests (expected %s)" %(counter.count, size),
+        )
+    return {
+        "seconds": seconds,
+        "seconds_per_row": seconds / size,
+    }
+
+
+BENCHMARKS = OrderedDict([
+    ("param_memory", bench_param_memory),
+    ("expand_memory", bench_expand_memory),
+    ("decorate_parameterized", bench_decorate_parameterized),
+    ("decorate_expand", bench_decorate_expand),
+    ("expand_with_patches", bench_expand_with_patches),
+    ("decorate_parameterized_class", bench_decorate_parameterized_class),
+    ("stack_inspection", bench_stack_inspection),
+    ("names_and_docs", bench_names_and_docs),
+    ("naming", bench_naming),
+    ("collect_generator", bench_collect_generator),
+    ("collect_unittest", bench_collect_unittest),
+    ("collect_pytest", bench_collect_pytest),
+])
+
+
+def run_benchmarks(names, sizes, repeat):
+    results = []
+    for name in names:
+        for size in sizes:
+            result = OrderedDict([("benchmark", name), ("size", size)])
+            try:
+                result.update(BENCHMARKS[name](size, repeat))
+            except BenchmarkSkipped as e:
+                result["skipped"] = str(e)
+            results.append(result)
+    return OrderedDict([
+        ("parameterized_version", __version__),
+        ("python_version", platform.python_version()),
+        ("python_implementation", platform.python_implementation()),
+        ("platform", platform.platform()),
+        ("repeat", repeat),
+        ("results", results),
+    ])
+
+
+def parse_list(value, type=str):
+    return [type(x) for x in value.split(",") if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m parameterized.benchmark",
+        description="Benchmark the overhead of parameterized.",
+    )
+    parser.add_argument(
+        "--sizes", type=lambda v: parse_list(v, int),
+        default=[10, 100, 1000, 10000, 100000],
+        help="comma separated numbers of rows (default: 10,100,1000,10000,100000)",
+    )
+    parser.add_argument(
+        "--benchmarks", type=parse_list, default=list(BENCHMARKS),
+        help="comma separated benchmarks to run (default: all of: %s)"
+        %(", ".join(BENCHMARKS), ),
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="number of times each timing is repeated; the fastest is "
+        "reported (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--output", default="-",
+        help="file to write the JSON results to (default: stdout)",
+    )
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error("unknown benchmarks: %s" %(", ".join(unknown), ))
+
+    results = run_benchmarks(args.benchmarks, args.sizes, args.repeat)
+    if args.output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
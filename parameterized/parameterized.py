@@ -1,11 +1,28 @@
+import os
 import re
 import sys
+import zlib
+import json
+import atexit
+import hashlib
+import pickle
+import shutil
+import tempfile
+import time
 import inspect
+import weakref
+import linecache
 import warnings
+import threading
+import importlib
+import itertools
+from array import array
 from typing import Iterable
-from functools import wraps
-from types import MethodType as MethodType
-from collections import namedtuple
+from collections.abc import Mapping
+from functools import wraps, partial, lru_cache
+from contextlib import contextmanager, ExitStack
+from types import MethodType as MethodType, CodeType
+from collections import namedtuple, deque, OrderedDict
 
 try:
     from unittest import mock
@@ -66,8 +83,39 @@ def to_text(x):
 
 CompatArgSpec = namedtuple("CompatArgSpec", "args varargs keywords defaults")
 
+# The arguments of a test function, precomputed by ``get_argument_layout`` so
+# they can be re-used for every row of a parameterized test:
+# - named_args: the names of the positional arguments, excluding ``self``
+# - defaults: ``defaults[n]`` is the ``(name, default)`` pairs used by
+#   ``parameterized_argument_value_pairs`` for a row with ``n`` arguments
+# - varargs, keywords: the display names of ``*args`` and ``**kwargs``
+ArgumentLayout = namedtuple("ArgumentLayout", "named_args defaults varargs keywords")
+
+# Signatures are cached per function; weakly, so functions (and the modules
+# which define them) can still be garbage collected or reloaded.
+_argspec_cache = weakref.WeakKeyDictionary()
+_argument_layout_cache = weakref.WeakKeyDictionary()
+
+
+def _cached_per_func(cache, func, compute):
+    try:
+        return cache[func]
+    except (KeyError, TypeError):
+        pass
+    result = compute(func)
+    try:
+        cache[func] = result
+    except TypeError:
+        # Not all callables can be weakly referenced; they aren't cached.
+        pass
+    return result
+
 
 def getargspec(func):
+    return _cached_per_func(_argspec_cache, func, _getargspec)
+
+
+def _getargspec(func):
     if PY2:
         return CompatArgSpec(*inspect.getargspec(func))
     args = inspect.getfullargspec(func)
@@ -106,6 +154,69 @@ def reapply_patches_if_need(func):
     return func
 
 
+class PatchTemplate(object):
+    """ The ``mock.patch`` decorators of a test expanded by
+        ``parameterized.expand``, which are re-applied to each of the test
+        cases it generates, so they don't share patches with each other, or
+        with the original function (see ``reapply_patches_if_need``).
+
+        Instead of re-applying every patch when each test case is created,
+        each test case gets its own copy of the list of patches (its
+        ``patchings``, which ``mock`` uses to apply them, and which may be
+        extended later; for example, by ``mock.patch`` class decorators), and
+        the patches are only applied to the function the first time the test
+        case runs. """
+
+    def __init__(self, func, patchings):
+        self.patchings = patchings
+        self.is_async = inspect.iscoroutinefunction(func)
+        # Patches are applied to a wrapper without ``patchings``, as
+        # ``mock`` adds patches to the ``patchings`` of functions which have
+        # them, instead of wrapping them.
+        if self.is_async:
+            async def bare_func(*args, **kwargs):
+                return await func(*args, **kwargs)
+        else:
+            def bare_func(*args, **kwargs):
+                return func(*args, **kwargs)
+        bare_func.__name__ = func.__name__
+        self.bare_func = bare_func
+
+    def new_patchings(self):
+        return list(self.patchings)
+
+    def apply(self, patchings):
+        """ Returns the function, patched by each of ``patchings``. """
+        if not patchings:
+            return self.bare_func
+        if self.is_async:
+            patched = patchings[0].decorate_async_callable(self.bare_func)
+        else:
+            patched = patchings[0].decorate_callable(self.bare_func)
+        # ``mock`` applies every patch in ``patched.patchings`` each time the
+        # function is called.
+        patched.patchings = patchings
+        return patched
+
+    def patched_func(self, patchings):
+        """ Returns a function which calls the function patched by
+            ``patchings``, which is only built when it's first called. """
+        patched = []
+
+        def get_patched():
+            if not patched:
+                patched.append(self.apply(patchings))
+            return patched[0]
+
+        if self.is_async:
+            async def call(*args, **kwargs):
+                return await get_patched()(*args, **kwargs)
+        else:
+            def call(*args, **kwargs):
+                return get_patched()(*args, **kwargs)
+        return call
+
+
 # `parameterized.expand` strips out `mock` patches from the source method in favor of re-applying them over the
 # generated methods instead. Sadly, this can cause problems with old versions of the `mock` package, as shown in
 # https://bugs.python.org/issue40126 (bpo-40126).
@@ -156,6 +267,36 @@ def delete_patches_if_need(func):
             func.patchings[:] = []
 
 
+class EmptyKwargs(dict):
+    """ The immutable, empty ``kwargs`` shared by every ``param`` which was
+        created without keyword arguments (see ``EMPTY_KWARGS``). Copies of
+        it are ordinary (mutable) dicts. """
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(
+            "The kwargs of a param without keyword arguments are shared, "
+            "and can't be modified (hint: modify a copy instead, for "
+            "example: `kwargs = dict(p.kwargs)`)"
+        )
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return "EMPTY_KWARGS"
+
+    def __copy__(self):
+        return {}
+
+    def __deepcopy__(self, memo):
+        return {}
+
+
+EMPTY_KWARGS = EmptyKwargs()
+
+
 _param = namedtuple("param", "args kwargs")
 
 class param(_param):
@@ -178,10 +319,20 @@ class param(_param):
             ])
             def test_stuff(foo, bar=16):
                 pass
+
+        Params are kept small, as there may be a very large number of them:
+        they don't have an instance ``__dict__``, and every param without
+        keyword arguments shares the same immutable, empty ``kwargs``
+        (``EMPTY_KWARGS``).
         """
 
+    __slots__ = ()
+
     def __new__(cls, *args , **kwargs):
-        return _param.__new__(cls, args, kwargs)
+        return _param.__new__(cls, args, kwargs or EMPTY_KWARGS)
+
+    def __getnewargs_ex__(self):
+        return self.args, dict(self.kwargs)
 
     @classmethod
     def explicit(cls, args=None, kwargs=None):
@@ -209,6 +360,9 @@ class param(_param):
             """
         if isinstance(args, param):
             return args
+        elif type(args) is tuple:
+            # Re-use the tuple instead of copying it into a new one.
+            return _param.__new__(cls, args, EMPTY_KWARGS)
         elif isinstance(args, (str, bytes)) or not isinstance(args, Iterable):
             args = (args, )
         try:
@@ -221,10 +375,648 @@ class param(_param):
                 %(args, args),
             )
 
+    @classmethod
+    def lazy(cls, factory, *args, **kwargs):
+        """ Returns an argument which is only built, by calling
+            ``factory(*args, **kwargs)``, when a test which uses it runs::
+
+                @parameterized.expand([
+                    ("simple", param.lazy(load_schema, "simple.json"), 1),
+                    ("nested", param.lazy(load_schema, "nested.json"), 3),
+                    ("depth", param.lazy(load_schema, "nested.json"), 3),
+                ])
+                def test_schema(self, name, schema, expected):
+                    ...
+
+            Built values are shared by every row which uses the same
+            ``factory`` and arguments (see ``LazyValueCache``).
+            """
+        return LazyValue(factory, args, kwargs)
+
     def __repr__(self):
         return "param(*%r, **%r)" %self
 
 
+class LazyValue(object):
+    """ An argument which is built when a test which uses it runs (see
+        ``param.lazy``).
+
+        Lazy values with the same ``factory`` and (hashable) arguments are
+        equal, and share the same cached value. """
+
+    __slots__ = ("factory", "args", "kwargs", "key")
+
+    def __init__(self, factory, args, kwargs):
+        self.factory = factory
+        self.args = args
+        self.kwargs = kwargs
+        key = (factory, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable arguments: the value is only shared by the rows
+            # which use this object.
+            key = object()
+        self.key = key
+
+    def build(self):
+        return self.factory(*self.args, **self.kwargs)
+
+    def __eq__(self, other):
+        if not isinstance(other, LazyValue):
+            return NotImplemented
+        return self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        factory = getattr(self.factory, "__qualname__", None) or repr(self.factory)
+        args = [repr(a) for a in self.args]
+        args.extend("%s=%r" %(k, v) for (k, v) in sorted(self.kwargs.items()))
+        return "param.lazy(%s)" %(", ".join([factory] + args), )
+
+
+class LazyValueCache(object):
+    """ A least recently used cache of the values built by ``param.lazy``.
+
+        Each row which uses a lazy value holds a reference to it from the time
+        its test is created (``acquire``) until the test has run
+        (``release``), and a value is dropped as soon as no remaining rows
+        need it. At most ``max_size`` values are kept (``None`` for no
+        limit); when there are more, the least recently used are evicted,
+        and will be built again if a row needs them.
+
+        The cache used by tests is configured with ``set_lazy_cache_size``.
+        """
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self.values = OrderedDict()
+        self.refcounts = {}
+        self.build_locks = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, lazy_values):
+        with self.lock:
+            for value in lazy_values:
+                self.refcounts[value.key] = self.refcounts.get(value.key, 0) + 1
+
+    def release(self, lazy_values):
+        with self.lock:
+            for value in lazy_values:
+                count = self.refcounts.get(value.key)
+                if count is None:
+                    continue
+                if count > 1:
+                    self.refcounts[value.key] = count - 1
+                else:
+                    del self.refcounts[value.key]
+                    self.values.pop(value.key, None)
+
+    def get(self, lazy_value):
+        key = lazy_value.key
+        with self.lock:
+            if key in self.values:
+                self.values.move_to_end(key)
+                return self.values[key]
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+        # Values are built outside of the cache's lock, so rows running
+        # concurrently aren't blocked by values they don't use, but only once
+        # for each key.
+        with build_lock:
+            with self.lock:
+                if key in self.values:
+                    return self.values[key]
+            try:
+                value = lazy_value.build()
+            finally:
+                with self.lock:
+                    self.build_locks.pop(key, None)
+            with self.lock:
+                self.values[key] = value
+                self.evict()
+        return value
+
+    def evict(self):
+        if self.max_size is None:
+            return
+        while len(self.values) > self.max_size:
+            self.values.popitem(last=False)
+
+    def set_max_size(self, max_size):
+        with self.lock:
+            self.max_size = max_size
+            self.evict()
+
+
+_lazy_value_cache = LazyValueCache()
+
+
+def set_lazy_cache_size(max_size):
+    """ Sets the maximum number of ``param.lazy`` values which are kept (see
+        ``LazyValueCache``). Use ``None`` for no limit, or ``0`` to build
+        lazy values again for every row. """
+    if max_size is not None and max_size < 0:
+        raise ValueError("Invalid lazy cache size: %r" %(max_size, ))
+    _lazy_value_cache.set_max_size(max_size)
+
+
+def find_lazy_values(args, kwargs):
+    lazy_values = [a for a in args if isinstance(a, LazyValue)]
+    # Other mappings (like TableRowKwargs) aren't checked, as that could
+    # load them.
+    if isinstance(kwargs, dict) and kwargs:
+        lazy_values.extend(v for v in kwargs.values() if isinstance(v, LazyValue))
+    return lazy_values
+
+
+@contextmanager
+def lazy_values_resolved(args, kwargs):
+    """ Yields ``(args, kwargs)`` with each ``param.lazy`` value replaced by
+        its value, releasing them once the row has run. """
+    lazy_values = find_lazy_values(args, kwargs)
+    if not lazy_values:
+        yield args, kwargs
+        return
+    resolve = lambda v: _lazy_value_cache.get(v) if isinstance(v, LazyValue) else v
+    try:
+        yield (
+            tuple(resolve(a) for a in args),
+            dict((k, resolve(v)) for (k, v) in kwargs.items()),
+        )
+    finally:
+        _lazy_value_cache.release(lazy_values)
+
+
+def call_with_lazy_values(func, args, kwargs):
+    with lazy_values_resolved(args, kwargs) as (args, kwargs):
+        return func(*args, **kwargs)
+
+
+class TableRowKwargs(Mapping):
+    """ The keyword arguments of a row of a ``TableSource``, which are only
+        decoded from the file when they're used (for example, when the row's
+        test runs). """
+
+    __slots__ = ("source", "index")
+
+    def __init__(self, source, index):
+        self.source = source
+        self.index = index
+
+    def __getitem__(self, key):
+        return self.source.get_row(self.index)[key]
+
+    def __iter__(self):
+        return iter(self.source.get_row(self.index))
+
+    def __len__(self):
+        return len(self.source.get_row(self.index))
+
+    def __repr__(self):
+        return repr(self.source.get_row(self.index))
+
+
+class TableSource(object):
+    """ The rows of a file, as ``param``s whose keyword arguments are the
+        row's columns (see ``parameterized.from_csv`` and
+        ``parameterized.from_jsonl``).
+
+        The file is memory mapped, and the offsets of its rows are indexed
+        the first time it's iterated over, but rows are only decoded when
+        their keyword arguments are used, so the whole file is never loaded
+        into memory. The most recently decoded row is cached, as its keyword
+        arguments are usually used several times in a row.
+
+        ``columns`` selects the columns which are passed to the test: either
+        a list of column names, or a dict of ``{column: argument name}``.
+        ``converters`` is a dict of ``{column: function}`` used to convert
+        the values of columns.
+
+        Subclasses implement ``index_rows()``, which returns the ``(start,
+        end)`` offsets of each row, and ``decode_row(data)``, which returns
+        the dict of columns of a row. """
+
+    def __init__(self, path, columns=None, converters=None, encoding="utf-8"):
+        if columns is not None and not isinstance(columns, dict):
+            columns = MaybeOrderedDict((column, column) for column in columns)
+        self.path = path
+        self.columns = columns
+        self.converters = converters or {}
+        self.encoding = encoding
+        self.file = None
+        self.data = None
+        self.starts = None
+        self.ends = None
+        self.last_row = (None, None)
+        self.lock = threading.Lock()
+
+    def open(self):
+        with self.lock:
+            if self.starts is not None:
+                return
+            self.file = open(self.path, "rb")
+            if os.fstat(self.file.fileno()).st_size:
+                # Imported here, as most tests don't use table sources.
+                import mmap
+                self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # Empty files can't be memory mapped
+                self.data = b""
+            starts = array("Q")
+            ends = array("Q")
+            for start, end in self.index_rows():
+                starts.append(start)
+                ends.append(end)
+            self.starts, self.ends = starts, ends
+
+    def close(self):
+        with self.lock:
+            if self.data is not None and not isinstance(self.data, bytes):
+                self.data.close()
+            if self.file is not None:
+                self.file.close()
+            self.file = self.data = self.starts = self.ends = None
+            self.last_row = (None, None)
+
+    def iter_lines(self, start=0):
+        """ Yields the ``(start, end)`` offsets of each non-empty line,
+            without its line ending. """
+        data = self.data
+        size = len(data)
+        while start < size:
+            end = data.find(b"\n", start)
+            if end < 0:
+                end = size
+            next_start = end + 1
+            if end > start and data[end - 1:end] == b"\r":
+                end -= 1
+            if end > start:
+                yield start, end
+            start = next_start
+
+    def index_rows(self):
+        raise NotImplementedError()
+
+    def decode_row(self, data):
+        raise NotImplementedError()
+
+    def get_row(self, index):
+        last_index, last_row = self.last_row
+        if last_index == index:
+            return last_row
+        self.open()
+        row = self.decode_row(self.data[self.starts[index]:self.ends[index]])
+        for column, converter in self.converters.items():
+            if column in row:
+                row[column] = converter(row[column])
+        if self.columns is not None:
+            try:
+                row = dict((name, row[column]) for (column, name) in self.columns.items())
+            except KeyError as e:
+                raise KeyError(
+                    "Row %s of %r doesn't have a %r column"
+                    %(index, self.path, e.args[0]),
+                )
+        self.last_row = (index, row)
+        return row
+
+    def __len__(self):
+        self.open()
+        return len(self.starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield _param.__new__(param, (), TableRowKwargs(self, index))
+
+    def __repr__(self):
+        return "<%s %r>" %(type(self).__name__, self.path)
+
+
+class CsvSource(TableSource):
+    """ The rows of a CSV file (see ``parameterized.from_csv``). Unless
+        ``fieldnames`` is given, the first row of the file has the names of
+        its columns. Other keyword arguments are passed to ``csv.reader``.
+        """
+
+    def __init__(self, path, columns=None, converters=None, encoding="utf-8",
+                 fieldnames=None, **fmtparams):
+        super(CsvSource, self).__init__(path, columns, converters, encoding)
+        # Imported here, as most tests don't use CSV files.
+        import csv
+        self.reader = csv.reader
+        self.fieldnames = fieldnames
+        self.fmtparams = fmtparams
+
+    def parse(self, data):
+        return next(self.reader([data.decode(self.encoding)], **self.fmtparams))
+
+    def index_rows(self):
+        lines = self.iter_lines()
+        quotechar = self.fmtparams.get("quotechar", '"').encode(self.encoding)
+        if self.data.find(quotechar) >= 0:
+            lines = self.join_quoted_lines(lines, quotechar)
+        if self.fieldnames is None:
+            header = next(lines, None)
+            self.fieldnames = [] if header is None else self.parse(self.data[header[0]:header[1]])
+        return lines
+
+    def join_quoted_lines(self, lines, quotechar):
+        """ Joins lines which end inside a quoted value (ie, after an odd
+            number of quote characters) with the lines which follow them. """
+        data = self.data
+        record_start = None
+        quotes = 0
+        for start, end in lines:
+            if record_start is None:
+                record_start = start
+            quotes += data[start:end].count(quotechar)
+            if quotes % 2 == 0:
+                yield record_start, end
+                record_start = None
+                quotes = 0
+        if record_start is not None:
+            yield record_start, end
+
+    def decode_row(self, data):
+        values = self.parse(data)
+        return dict(zip(self.fieldnames, values))
+
+
+class JsonLinesSource(TableSource):
+    """ The rows of a JSON lines file, where each line is a JSON object (see
+        ``parameterized.from_jsonl``). """
+
+    def index_rows(self):
+        return self.iter_lines()
+
+    def decode_row(self, data):
+        row = json.loads(data.decode(self.encoding))
+        if not isinstance(row, dict):
+            raise ValueError(
+                "Rows of %r must be JSON objects, not: %s"
+                %(self.path, short_repr(row)),
+            )
+        return row
+
+
+class LazyExpandedFunc(object):
+    """ A placeholder for a test method generated by
+        ``@parameterized.expand(..., lazy=True)``.
+
+        The test function is only built the first time it is looked up on a
+        test case instance (for example, when ``TestCase.__init__`` looks up
+        its test method), so running a handful of tests from a large expansion
+        doesn't pay for building all of them. """
+
+    __slots__ = ("materialize", "num", "param", "name", "func")
+
+    def __init__(self, materialize, num, p, name):
+        self.materialize = materialize
+        self.num = num
+        self.param = p
+        self.name = name
+        self.func = None
+
+    def get_func(self):
+        if self.func is None:
+            self.func = self.materialize(self.num, self.param, self.name)
+        return self.func
+
+    def __get__(self, instance, owner):
+        # Looking the test up on the class (as test loaders do for every
+        # test name, before selecting which tests to run) returns the
+        # placeholder, which is callable, so the test is only built when it's
+        # bound to a test case instance (ie, when it will run).
+        if instance is None:
+            return self
+        return self.get_func().__get__(instance, owner)
+
+    def __call__(self, *args, **kwargs):
+        return self.get_func()(*args, **kwargs)
+
+    @property
+    def patchings(self):
+        # A class decorated with `mock.patch` adds its patch to the
+        # `patchings` of each test method which has them (see
+        # PatchTemplate), which requires building the test.
+        try:
+            return self.get_func().patchings
+        except AttributeError:
+            raise AttributeError("patchings")
+
+    def __repr__(self):
+        return "<lazy parameterized test %s>" %(self.name, )
+
+
+class StreamingInput(object):
+    """ The input to ``@parameterized(..., stream=True)``, which is consumed
+        lazily, one row at a time, each time the test generator runs.
+
+        When the input is a callable, it is called each time the generator
+        runs, so it can be iterated any number of times. Other re-iterable
+        inputs (like lists) can also be iterated many times, but an iterator
+        can only be iterated once: to make sure rows aren't silently dropped
+        (for example, with ``nosetests --processes=n``; see
+        https://github.com/wolever/nose-parameterized/pull/31), a second pass
+        will raise an exception. """
+
+    def __init__(self, input):
+        self.input = input
+        self.consumed = False
+
+    def __iter__(self):
+        if callable(self.input):
+            return iter(self.input())
+        if self.consumed:
+            raise ValueError(
+                "The input to `@parameterized(..., stream=True)` is an "
+                "iterator which has already been consumed (hint: pass a "
+                "callable which returns a new iterator instead)"
+            )
+        iterator = iter(self.input)
+        if iterator is self.input:
+            self.consumed = True
+        return iterator
+
+
+class RowBatch(object):
+    """ A group of rows which are run together, the first time the test
+        generated for any one of them runs. The test generated for each row
+        then reports that row's outcome, by returning its result or re-raising
+        its exception.
+
+        Subclasses implement ``run(args, kwargs)``, which is called with the
+        arguments of the first test to run (ie, ``self``), and returns a list
+        with the result (or exception) of each row.
+
+        ``nums`` are the numbers of the rows in the parameterized input. Rows
+        are profiled (see ``add_row_hook``) if a row hook had been added when
+        the batch was created. """
+
+    def __init__(self, params, nums=None):
+        self.params = params
+        self.nums = list(range(len(params)) if nums is None else nums)
+        self.profile = bool(get_row_hooks())
+        self.outcomes = None
+        self.lock = threading.Lock()
+
+    def run(self, args, kwargs):
+        raise NotImplementedError()
+
+    def get_outcome(self, index, args, kwargs):
+        with self.lock:
+            if self.outcomes is None:
+                try:
+                    self.outcomes = self.run(args, kwargs)
+                except BaseException as e:
+                    self.outcomes = [e] * len(self.params)
+        outcome = self.outcomes[index]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+class AsyncRowBatch(RowBatch):
+    """ Runs all the rows of an async test (see
+        ``parameterized.expand(..., async_concurrency=n)``) concurrently in a
+        single event loop, with at most ``concurrency`` running at once. """
+
+    def __init__(self, func, params, concurrency, skip_unchanged=False, nums=None):
+        super(AsyncRowBatch, self).__init__(params, nums=nums)
+        self.func = func
+        self.concurrency = concurrency
+        self.skip_unchanged = skip_unchanged
+
+    def run(self, args, kwargs):
+        # Imported here, as importing asyncio is slow, and most tests don't
+        # need it.
+        import asyncio
+
+        async def run_row(semaphore, num, p):
+            func = self.func
+            if self.skip_unchanged:
+                func = UnchangedRowGuard(func, p).wrap(func)
+            if self.profile:
+                # Rows run concurrently, so their memory can't be measured.
+                func = RowProfiler(self.func, num, p, trace_memory=False).wrap(func)
+            async with semaphore:
+                with lazy_values_resolved(p.args, p.kwargs) as (row_args, row_kwargs):
+                    return await func(*(args + row_args), **row_kwargs, **kwargs)
+
+        async def run_rows():
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(
+                *[run_row(semaphore, num, p) for (num, p) in zip(self.nums, self.params)],
+                return_exceptions=True
+            )
+
+        # The loop is run in its own thread so it can't interfere with any
+        # event loop the test runner is using in this one.
+        with get_executor_class("thread")(max_workers=1) as pool:
+            return pool.submit(asyncio.run, run_rows()).result()
+
+
+class VectorizedRowBatch(RowBatch):
+    """ Runs a batch of rows with a single call to the test function (see
+        ``parameterized.expand(..., batch=n)``), which is passed each argument
+        as a column: a list (or, with ``stack``, ``stack(list)``) of the
+        values of that argument in every row.
+
+        The test function returns ``None`` if every row passed, or a sequence
+        with the outcome of each row: ``None`` or a true value if it passed, a
+        false value if it failed, or the exception it raised. If it raises an
+        exception, every row in the batch does. """
+
+    def __init__(self, func, params, stack=None, nums=None):
+        super(VectorizedRowBatch, self).__init__(params, nums=nums)
+        self.func = func
+        self.stack = stack or list
+
+    def stack_columns(self, rows):
+        first_args, first_kwargs = rows[0]
+        for num, (row_args, row_kwargs) in zip(self.nums, rows):
+            if len(row_args) != len(first_args) or set(row_kwargs) != set(first_kwargs):
+                raise ValueError(
+                    "Every row in a batch must have the same arguments, but "
+                    "row %s has %s and row %s has %s" %(
+                        num, self.describe_row(row_args, row_kwargs),
+                        self.nums[0], self.describe_row(first_args, first_kwargs),
+                    )
+                )
+        args = tuple(
+            self.stack([row_args[i] for (row_args, _) in rows])
+            for i in range(len(first_args))
+        )
+        kwargs = dict(
+            (key, self.stack([row_kwargs[key] for (_, row_kwargs) in rows]))
+            for key in first_kwargs
+        )
+        return args, kwargs
+
+    def describe_row(self, args, kwargs):
+        return "%s positional arguments and keyword arguments %s" %(
+            len(args), sorted(kwargs),
+        )
+
+    def run(self, args, kwargs):
+        if not self.profile:
+            return self.run_batch(args, kwargs)
+        # Every row is reported with the duration and peak memory of the
+        # whole batch.
+        profilers = [RowProfiler(self.func, num, p) for (num, p) in zip(self.nums, self.params)]
+        started = profilers[0].start()
+        try:
+            outcomes = self.run_batch(args, kwargs)
+        except BaseException as e:
+            for profiler in profilers:
+                profiler.finish(started, profiler.get_outcome(e))
+            raise
+        for profiler, outcome in zip(profilers, outcomes):
+            profiler.finish(started, "passed" if outcome is None else profiler.get_outcome(outcome))
+        return outcomes
+
+    def run_batch(self, args, kwargs):
+        with ExitStack() as stack:
+            rows = [
+                stack.enter_context(lazy_values_resolved(p.args, p.kwargs))
+                for p in self.params
+            ]
+            column_args, column_kwargs = self.stack_columns(rows)
+            result = self.func(*(args + column_args), **column_kwargs, **kwargs)
+        if result is None:
+            return [None] * len(self.params)
+        try:
+            outcomes = list(result)
+        except TypeError:
+            raise TypeError(
+                "Batched test %r must return None, or a sequence with the "
+                "outcome of each row, not %s" %(self.func, short_repr(result)),
+            )
+        if len(outcomes) != len(self.params):
+            raise ValueError(
+                "Batched test %r returned %s outcomes for %s rows"
+                %(self.func, len(outcomes), len(self.params)),
+            )
+        return [
+            self.get_row_outcome(index, outcome)
+            for (index, outcome) in enumerate(outcomes)
+        ]
+
+    def get_row_outcome(self, index, outcome):
+        if outcome is None or isinstance(outcome, BaseException):
+            return outcome
+        if outcome:
+            return None
+        return AssertionError("Row %s (row %s of its batch) failed (its outcome was %s)" %(
+            self.nums[index], index, short_repr(outcome),
+        ))
+
+
 class QuietOrderedDict(MaybeOrderedDict):
     """ When OrderedDict is available, use it to make sure that the kwargs in
         doc strings are consistently ordered. """
@@ -261,37 +1053,257 @@ def parameterized_argument_value_pairs(func, p):
             >>> parameterized_argument_value_pairs(func, p)
             [("foo", 1), ("*args", (16, ))]
     """
-    argspec = getargspec(func)
-    arg_offset = 1 if argspec.args[:1] == ["self"] else 0
-
-    named_args = argspec.args[arg_offset:]
+    layout = get_argument_layout(func)
 
-    result = lzip(named_args, p.args)
-    named_args = argspec.args[len(result) + arg_offset:]
+    result = lzip(layout.named_args, p.args)
     varargs = p.args[len(result):]
 
     result.extend([
         (name, p.kwargs.get(name, default))
         for (name, default)
-        in zip(named_args, argspec.defaults or [])
+        in layout.defaults[len(result)]
     ])
 
-    seen_arg_names = set([ n for (n, _) in result ])
-    keywords = QuietOrderedDict(sorted([
-        (name, p.kwargs[name])
-        for name in p.kwargs
-        if name not in seen_arg_names
-    ]))
+    if p.kwargs:
+        seen_arg_names = set([ n for (n, _) in result ])
+        keywords = QuietOrderedDict(sorted([
+            (name, p.kwargs[name])
+            for name in p.kwargs
+            if name not in seen_arg_names
+        ]))
+    else:
+        keywords = None
 
     if varargs:
-        result.append(("*%s" %(argspec.varargs, ), tuple(varargs)))
+        result.append((layout.varargs, tuple(varargs)))
 
     if keywords:
-        result.append(("**%s" %(argspec.keywords, ), keywords))
+        result.append((layout.keywords, keywords))
 
     return result
 
 
+def get_argument_layout(func):
+    """ Returns the (cached) ``ArgumentLayout`` of ``func``. """
+    return _cached_per_func(_argument_layout_cache, func, _get_argument_layout)
+
+
+def _get_argument_layout(func):
+    argspec = getargspec(func)
+    arg_offset = 1 if argspec.args[:1] == ["self"] else 0
+    named_args = tuple(argspec.args[arg_offset:])
+    # The defaults are matched with the named arguments which follow the
+    # positional arguments of each row, so precompute the pairs for every
+    # possible number of positional arguments.
+    defaults = tuple(
+        tuple(zip(named_args[num_args:], argspec.defaults or ()))
+        for num_args in range(len(named_args) + 1)
+    )
+    return ArgumentLayout(
+        named_args=named_args,
+        defaults=defaults,
+        varargs="*%s" %(argspec.varargs, ),
+        keywords="**%s" %(argspec.keywords, ),
+    )
+
+
+class TruncatingRepr(object):
+    """ Builds the start (``head(x, k)``) or the end (``tail(x, k)``) of
+        ``repr(x)``, without building the rest of it, so the repr of a huge
+        string or list can be shortened without formatting all of it.
+
+        Both return ``(text, complete)``: when ``complete`` is true, ``text``
+        is all of ``repr(x)``; otherwise, it is at least ``k`` characters of
+        it.
+
+        Strings, bytes and the builtin containers are handled by the
+        ``head_*`` and ``tail_*`` methods named in ``types``, and their
+        output is exactly the same as the corresponding part of their repr.
+        Other types use ``repr(x)`` (for example, numpy arrays summarize
+        their own repr). Subclasses can handle more types by adding them to
+        ``types``.
+        """
+
+    types = {
+        str: "str",
+        bytes: "bytes",
+        bytearray: "bytearray",
+        list: "list",
+        tuple: "tuple",
+        dict: "dict",
+        QuietOrderedDict: "dict",
+        set: "set",
+        frozenset: "frozenset",
+    }
+
+    def __init__(self):
+        # The ids of the containers being formatted, so recursive containers
+        # are formatted like ``repr`` formats them (ie, ``[[...]]``).
+        self.running = set()
+
+    def head(self, x, k):
+        name = self.types.get(type(x))
+        if name is None:
+            return repr(x), True
+        return getattr(self, "head_" + name)(x, k)
+
+    def tail(self, x, k):
+        name = self.types.get(type(x))
+        if name is None:
+            return repr(x), True
+        return getattr(self, "tail_" + name)(x, k)
+
+    def quoted_chunk(self, x, chunk, escape_single=False):
+        """ Returns the quote ``repr(x)`` uses, and the escaped characters of
+            ``chunk`` (a part of ``x``) as they appear in ``repr(x)``. When
+            ``escape_single`` is true, ``'`` is always escaped (as it is by
+            the repr of ``bytearray``). """
+        # Strings are quoted with ' unless they contain ' but not ".
+        single, double = ("'", '"') if isinstance(x, str) else (b"'", b'"')
+        quote = '"' if (single in x and double not in x) else "'"
+        chunk_repr = repr(chunk)
+        body = chunk_repr[chunk_repr.index(chunk_repr[-1]) + 1:-1]
+        if chunk_repr[-1] != quote or (escape_single and quote == '"'):
+            body = body.replace("'", "\\'")
+        return quote, body
+
+    def head_str(self, x, k, prefix=""):
+        if len(x) < k:
+            return repr(x), True
+        quote, body = self.quoted_chunk(x, x[:k])
+        return prefix + quote + body, False
+
+    def tail_str(self, x, k, suffix=""):
+        if len(x) < k:
+            return repr(x), True
+        quote, body = self.quoted_chunk(x, x[len(x) - k:])
+        return body + quote + suffix, False
+
+    def head_bytes(self, x, k):
+        return self.head_str(x, k, prefix="b")
+
+    def tail_bytes(self, x, k):
+        return self.tail_str(x, k)
+
+    def head_bytearray(self, x, k):
+        if len(x) < k:
+            return repr(x), True
+        quote, body = self.quoted_chunk(x, bytes(x[:k]), escape_single=True)
+        return "bytearray(b" + quote + body, False
+
+    def tail_bytearray(self, x, k):
+        if len(x) < k:
+            return repr(x), True
+        quote, body = self.quoted_chunk(x, bytes(x[len(x) - k:]), escape_single=True)
+        return body + quote + ")", False
+
+    def head_items(self, x, k, items, start, end, format_item):
+        """ The head of a container: ``start``, the reprs of ``items``
+            separated by commas, then ``end``. ``format_item(item, k)``
+            returns the (head of the) repr of an item. """
+        if id(x) in self.running:
+            return start + "..." + end[-1:], True
+        self.running.add(id(x))
+        try:
+            parts = [start]
+            length = len(start)
+            for num, item in enumerate(items):
+                if num:
+                    parts.append(", ")
+                    length += 2
+                if length >= k:
+                    return "".join(parts), False
+                text, complete = format_item(item, k - length)
+                parts.append(text)
+                length += len(text)
+                if not complete:
+                    return "".join(parts), False
+            parts.append(end)
+            return "".join(parts), True
+        finally:
+            self.running.discard(id(x))
+
+    def tail_items(self, x, k, reversed_items, start, end, format_item):
+        """ The tail of a container (see ``head_items``), where
+            ``reversed_items`` are its items from last to first, and
+            ``format_item(item, k)`` returns the tail of an item's repr. """
+        if id(x) in self.running:
+            return start + "..." + end[-1:], True
+        self.running.add(id(x))
+        try:
+            parts = [end]
+            length = len(end)
+            for num, item in enumerate(reversed_items):
+                if num:
+                    parts.append(", ")
+                    length += 2
+                if length >= k:
+                    return "".join(reversed(parts)), False
+                text, complete = format_item(item, k - length)
+                parts.append(text)
+                length += len(text)
+                if not complete:
+                    return "".join(reversed(parts)), False
+            parts.append(start)
+            return "".join(reversed(parts)), True
+        finally:
+            self.running.discard(id(x))
+
+    def head_list(self, x, k):
+        return self.head_items(x, k, x, "[", "]", self.head)
+
+    def tail_list(self, x, k):
+        return self.tail_items(x, k, reversed(x), "[", "]", self.tail)
+
+    def head_tuple(self, x, k):
+        return self.head_items(x, k, x, "(", ",)" if len(x) == 1 else ")", self.head)
+
+    def tail_tuple(self, x, k):
+        return self.tail_items(x, k, reversed(x), "(", ",)" if len(x) == 1 else ")", self.tail)
+
+    def head_dict(self, x, k):
+        return self.head_items(x, k, x.items(), "{", "}", self.head_dict_item)
+
+    def tail_dict(self, x, k):
+        return self.tail_items(x, k, reversed(x.items()), "{", "}", self.tail_dict_item)
+
+    def head_dict_item(self, item, k):
+        key, complete = self.head(item[0], k)
+        if not complete or len(key) + 2 >= k:
+            return key + (": " if complete else ""), False
+        value, complete = self.head(item[1], k - len(key) - 2)
+        return key + ": " + value, complete
+
+    def tail_dict_item(self, item, k):
+        value, complete = self.tail(item[1], k)
+        if not complete or len(value) + 2 >= k:
+            return (": " if complete else "") + value, False
+        key, complete = self.tail(item[0], k - len(value) - 2)
+        return key + ": " + value, complete
+
+    def head_set(self, x, k, name="set"):
+        if not x:
+            return repr(x), True
+        start = "{" if name == "set" else name + "({"
+        end = "}" if name == "set" else "})"
+        return self.head_items(x, k, x, start, end, self.head)
+
+    def tail_set(self, x, k, name="set"):
+        if not x:
+            return repr(x), True
+        start = "{" if name == "set" else name + "({"
+        end = "}" if name == "set" else "})"
+        # Sets can't be iterated backwards, but listing their items is much
+        # cheaper than formatting them.
+        return self.tail_items(x, k, reversed(list(x)), start, end, self.tail)
+
+    def head_frozenset(self, x, k):
+        return self.head_set(x, k, name="frozenset")
+
+    def tail_frozenset(self, x, k):
+        return self.tail_set(x, k, name="frozenset")
+
+
 def short_repr(x, n=64):
     """ A shortened repr of ``x`` which is guaranteed to be ``unicode``::
 
@@ -299,12 +1311,20 @@ def short_repr(x, n=64):
             u"foo"
             >>> short_repr("123456789", n=4)
             u"12...89"
+
+        Only the parts of the repr which are shown are built (see
+        ``TruncatingRepr``), so shortening the repr of a huge value is cheap.
     """
 
-    x_repr = to_text(repr(x))
-    if len(x_repr) > n:
-        x_repr = x_repr[:n//2] + "..." + x_repr[len(x_repr) - n//2:]
-    return x_repr
+    reprs = TruncatingRepr()
+    x_repr, complete = reprs.head(x, n + 1)
+    if complete and len(x_repr) <= n:
+        return to_text(x_repr)
+    if complete:
+        x_tail = x_repr
+    else:
+        x_tail, _ = reprs.tail(x, n//2)
+    return to_text(x_repr[:n//2] + "..." + x_tail[len(x_tail) - n//2:])
 
 
 def default_doc_func(func, num, p):
@@ -331,6 +1351,90 @@ def default_doc_func(func, num, p):
     )
 
 
+_unsafe_name_chars = re.compile("[^a-zA-Z0-9_]+")
+
+# Names are often generated from the same few strings (for example, many rows
+# which share a first argument), so short strings are memoized.
+_SAFE_NAME_CACHE_MAX_LENGTH = 256
+
+@lru_cache(maxsize=4096)
+def _cached_safe_name(s):
+    return str(_unsafe_name_chars.sub("_", s))
+
+
+class LazyDocstring(object):
+    """ The docstring of a generated test when ``lazy_doc=True`` is used
+        (or when its row comes from a ``TableSource``), which is only built (by ``default_doc_func``) the first time it's
+        used, as formatting the values of every parameter can be expensive,
+        and most docstrings are never displayed. It behaves like the string
+        it builds, but it isn't a ``str``, so code which checks (for example,
+        ``inspect.getdoc`` or ``textwrap.dedent``) needs
+        ``str(func.__doc__)``. """
+
+    __slots__ = ("func", "num", "param", "doc")
+
+    def __init__(self, func, num, p):
+        self.func = func
+        self.num = num
+        self.param = p
+        self.doc = None
+
+    def __str__(self):
+        if self.doc is None:
+            self.doc = default_doc_func(self.func, self.num, self.param)
+            self.func = self.param = None
+        return self.doc
+
+    def __getattr__(self, name):
+        return getattr(str(self), name)
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, LazyDocstring):
+            other = str(other)
+        return str(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __len__(self):
+        return len(str(self))
+
+    def __bool__(self):
+        return bool(str(self))
+
+    def __iter__(self):
+        return iter(str(self))
+
+    def __contains__(self, item):
+        return item in str(self)
+
+    def __getitem__(self, key):
+        return str(self)[key]
+
+    def __add__(self, other):
+        return str(self) + other
+
+    def __radd__(self, other):
+        return other + str(self)
+
+
+def make_doc(doc_func, func, num, p, lazy=False):
+    """ Returns the docstring of test ``num``. With ``lazy=True``, or if
+        the row comes from a ``TableSource`` (as building the docstring would
+        decode the row), it's built lazily (see ``LazyDocstring``) if it's
+        built by ``default_doc_func``. """
+    lazy = lazy or isinstance(p.kwargs, TableRowKwargs)
+    if lazy and doc_func is default_doc_func and func.__doc__ is not None:
+        return LazyDocstring(func, num, p)
+    return doc_func(func, num, p)
+
+
 def default_name_func(func, num, p):
     base_name = func.__name__
     name_suffix = "_%s" %(num, )
@@ -340,6 +1444,770 @@ def default_name_func(func, num, p):
     return base_name + name_suffix
 
 
+def canonicalize(x):
+    """ Converts ``x`` to a structure which can be serialized as JSON, and
+        whose serialization only depends on ``x``'s contents (ie, sets and
+        dicts are sorted). Values of other types are represented by their
+        ``repr``, so they must have a stable ``repr`` (ie, one which doesn't
+        include their address in memory). """
+    if x is None or isinstance(x, (bool, int, float, str)):
+        return x
+    if isinstance(x, (list, tuple)):
+        return [canonicalize(item) for item in x]
+    if isinstance(x, dict):
+        items = [[canonicalize(k), canonicalize(v)] for (k, v) in x.items()]
+        return {"__dict__": sorted(items, key=json.dumps)}
+    if isinstance(x, (set, frozenset)):
+        return {"__set__": sorted((canonicalize(item) for item in x), key=json.dumps)}
+    if isinstance(x, (bytes, bytearray)):
+        return {"__bytes__": bytes(x).hex()}
+    return {"__repr__": repr(x)}
+
+
+def serialize_param(p):
+    """ The default serializer used by ``param_fingerprint``: the canonical
+        JSON of ``p``'s arguments (see ``canonicalize``). """
+    return json.dumps(
+        [canonicalize(p.args), canonicalize(dict(p.kwargs))],
+        sort_keys=True, separators=(",", ":"),
+    )
+
+
+def param_fingerprint(p, serializer=None):
+    """ Returns a hash (as a hex string) of the arguments of param ``p``,
+        which only changes when they do, so it can be used as a stable id for
+        ``p`` (for example, as the key of cached test results).
+
+        ``serializer(p)`` returns the ``str`` or ``bytes`` which is hashed
+        (by default, ``serialize_param``). """
+    data = (serializer or serialize_param)(p)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).hexdigest()
+
+
+def stable_name_func(serializer=None, length=8):
+    """ Returns a ``batch_name_func`` for ``parameterized.expand`` which names
+        test cases with the first ``length`` characters of their
+        ``param_fingerprint`` (instead of their index), so the names of test
+        cases don't change when other test cases are added, removed, or
+        re-ordered::
+
+            @parameterized.expand([
+                ("foo", 1),
+                ("bar", 2),
+            ], batch_name_func=stable_name_func())
+            def test_stuff(self, name, value):
+                ...
+
+        This creates ``test_stuff_<hash>_foo`` and ``test_stuff_<hash>_bar``.
+        When several test cases have the same parameters, a suffix is added
+        to the names of all but the first (``_1``, ``_2``, ...).
+        """
+    def batch_name_func(func, nums, params):
+        seen = {}
+        names = []
+        for p in params:
+            name = "%s_%s" %(func.__name__, param_fingerprint(p, serializer)[:length])
+            if len(p.args) > 0 and isinstance(p.args[0], string_types):
+                name += "_" + parameterized.to_safe_name(p.args[0])
+            count = seen.get(name, 0)
+            seen[name] = count + 1
+            names.append(name if not count else "%s_%s" %(name, count))
+        return names
+    return batch_name_func
+
+
+def get_cache_dir():
+    """ The directory where ``parameterized`` keeps its caches: the
+        ``PARAMETERIZED_CACHE_DIR`` environment variable, or
+        ``.parameterized_cache`` in the current directory. """
+    return os.environ.get("PARAMETERIZED_CACHE_DIR") or ".parameterized_cache"
+
+
+_shutdown_hooks = []
+
+
+def add_shutdown_hook(func):
+    """ Calls ``func`` when the interpreter exits, or when ``shutdown()`` is
+        called (whichever comes first). """
+    atexit.register(func)
+    _shutdown_hooks.append(func)
+
+
+def remove_shutdown_hook(func):
+    atexit.unregister(func)
+    _shutdown_hooks[:] = [hook for hook in _shutdown_hooks if hook != func]
+
+
+def shutdown():
+    """ Runs (and removes) the hooks added with ``add_shutdown_hook``, which
+        commit the ``ResultCache`` and tear down any ``SharedClassSetup`` that
+        is still set up. Processes which exit without running ``atexit``
+        handlers (like the workers of a ``multiprocessing`` pool) must call it
+        before they exit, as ``python -m parameterized.run`` does. """
+    while _shutdown_hooks:
+        func = _shutdown_hooks.pop()
+        atexit.unregister(func)
+        func()
+
+
+_code_fingerprint_cache = weakref.WeakKeyDictionary()
+
+
+def code_fingerprint(func):
+    """ Returns a hash of the code of ``func`` (including the code of the
+        functions and classes defined in it), which only changes when its code
+        does (ie, not when it's moved to another line). Decorators which set
+        ``__wrapped__`` are unwrapped. The code ``func`` calls isn't included.
+        """
+    return _cached_per_func(_code_fingerprint_cache, inspect.unwrap(func), _code_fingerprint)
+
+
+def _code_fingerprint(func):
+    digest = hashlib.sha1()
+
+    def update(code):
+        digest.update(code.co_code)
+        digest.update(repr((code.co_names, code.co_varnames, code.co_freevars)).encode("utf-8"))
+        for const in code.co_consts:
+            if isinstance(const, CodeType):
+                update(const)
+            else:
+                digest.update(repr(const).encode("utf-8"))
+
+    update(func.__code__)
+    return digest.hexdigest()
+
+
+class ResultCache(object):
+    """ A SQLite database of the rows of ``skip_unchanged`` tests which
+        passed the last time they ran, keyed by their test function and
+        ``param_fingerprint``, along with the ``code_fingerprint`` of the test
+        function when they passed.
+
+        Writes are committed in batches of ``commit_every`` (and when the
+        interpreter exits, or ``shutdown()`` is called). """
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self.connection = None
+        self.passed = {}
+        self.pending_writes = 0
+        self.lock = threading.RLock()
+
+    def connect(self):
+        if self.connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Imported here, as most tests don't use skip_unchanged.
+            import sqlite3
+            self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS passed ("
+                "func TEXT, param TEXT, code TEXT, PRIMARY KEY (func, param))"
+            )
+            add_shutdown_hook(self.commit)
+        return self.connection
+
+    def get_passed(self, func_key):
+        """ Returns ``{param_fingerprint: code_fingerprint}`` for the rows of
+            ``func_key`` which passed. They're loaded the first time each
+            function is used. """
+        with self.lock:
+            passed = self.passed.get(func_key)
+            if passed is None:
+                passed = self.passed[func_key] = dict(self.connect().execute(
+                    "SELECT param, code FROM passed WHERE func = ?", (func_key, ),
+                ))
+            return passed
+
+    def is_unchanged(self, func_key, param_fp, code_fp):
+        return self.get_passed(func_key).get(param_fp) == code_fp
+
+    def record(self, func_key, param_fp, code_fp, passed):
+        with self.lock:
+            connection = self.connect()
+            if passed:
+                self.get_passed(func_key)[param_fp] = code_fp
+                connection.execute(
+                    "INSERT OR REPLACE INTO passed VALUES (?, ?, ?)",
+                    (func_key, param_fp, code_fp),
+                )
+            else:
+                self.get_passed(func_key).pop(param_fp, None)
+                connection.execute(
+                    "DELETE FROM passed WHERE func = ? AND param = ?",
+                    (func_key, param_fp),
+                )
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.commit()
+
+    def commit(self):
+        with self.lock:
+            if self.connection is not None and self.pending_writes:
+                self.connection.commit()
+                self.pending_writes = 0
+
+    def close(self):
+        with self.lock:
+            self.commit()
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+                self.passed = {}
+
+
+_result_cache = None
+
+
+def set_result_cache(path):
+    """ Sets the path of the SQLite database used by ``skip_unchanged`` tests
+        (by default, ``results.sqlite`` in ``get_cache_dir()``). ``None``
+        resets it to the default. """
+    global _result_cache
+    if _result_cache is not None:
+        _result_cache.close()
+    _result_cache = None if path is None else ResultCache(path)
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(os.path.join(get_cache_dir(), "results.sqlite"))
+    return _result_cache
+
+
+class UnchangedRowGuard(object):
+    """ Runs one row of a ``skip_unchanged`` test: the row is skipped (by
+        raising ``SkipTest``) if it passed the last time it ran, and neither
+        its parameters nor the code of the test function have changed since
+        then. Otherwise it's run, and its outcome is recorded in the
+        ``ResultCache``.
+
+        The outcomes of a test method are recorded separately for each class
+        it's run on (for example, each class generated by
+        ``parameterized_class``), which is ``test_cls`` if it's given, or the
+        class of the instance the row is called on. """
+
+    __slots__ = ("test_func", "param", "test_cls", "keys")
+
+    def __init__(self, test_func, p, test_cls=None):
+        self.test_func = test_func
+        self.param = p
+        self.test_cls = test_cls
+        self.keys = {}
+
+    def get_test_class(self, args):
+        if self.test_cls is not None or not args:
+            return self.test_cls
+        func = inspect.unwrap(self.test_func)
+        owner = func.__qualname__.rpartition(".")[0]
+        test_cls = type(args[0])
+        if owner and any(
+            cls.__module__ == func.__module__ and cls.__qualname__ == owner
+            for cls in test_cls.__mro__
+        ):
+            return test_cls
+        return None
+
+    def get_keys(self, test_cls=None):
+        keys = self.keys.get(test_cls)
+        if keys is None:
+            func = inspect.unwrap(self.test_func)
+            if test_cls is None:
+                func_key = "%s.%s" %(func.__module__, func.__qualname__)
+            else:
+                func_key = "%s.%s.%s" %(
+                    test_cls.__module__, test_cls.__qualname__,
+                    func.__qualname__.rpartition(".")[2],
+                )
+            keys = self.keys[test_cls] = (
+                func_key,
+                param_fingerprint(self.param),
+                code_fingerprint(func),
+            )
+        return keys
+
+    def unchanged(self, test_cls=None):
+        return get_result_cache().is_unchanged(*self.get_keys(test_cls or self.test_cls))
+
+    def check(self, test_cls=None):
+        if self.unchanged(test_cls):
+            raise SkipTest("unchanged since it last passed")
+
+    def record(self, passed, test_cls=None):
+        get_result_cache().record(*(self.get_keys(test_cls or self.test_cls) + (passed, )))
+
+    def call(self, func, *args, **kwargs):
+        test_cls = self.get_test_class(args)
+        self.check(test_cls)
+        try:
+            result = func(*args, **kwargs)
+        except SkipTest:
+            raise
+        except BaseException:
+            self.record(False, test_cls)
+            raise
+        self.record(True, test_cls)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        test_cls = self.get_test_class(args)
+        self.check(test_cls)
+        try:
+            result = await func(*args, **kwargs)
+        except SkipTest:
+            raise
+        except BaseException:
+            self.record(False, test_cls)
+            raise
+        self.record(True, test_cls)
+        return result
+
+    def wrap(self, func):
+        """ Returns a function which runs ``func`` with this guard. """
+        if inspect.iscoroutinefunction(func):
+            return partial(self.acall, func)
+        return partial(self.call, func)
+
+
+class CircuitBreaker(object):
+    """ Skips the remaining rows of a parameterized test once
+        ``max_failures`` consecutive rows have failed with the same type of
+        exception (for example, because a service they all depend on isn't
+        running), instead of letting each of them fail (and time out)
+        separately. Rows which are skipped don't count, and a row which
+        passes resets the count. """
+
+    def __init__(self, max_failures):
+        if max_failures < 1:
+            raise ValueError(
+                "max_consecutive_failures= must be at least 1, not %r" %(max_failures, )
+            )
+        self.max_failures = max_failures
+        self.failures = 0
+        self.failure_type = None
+        self.reason = None
+        self.lock = threading.Lock()
+
+    def is_open(self):
+        return self.reason is not None
+
+    def check(self):
+        if self.reason is not None:
+            raise SkipTest(self.reason)
+
+    def record(self, exc):
+        with self.lock:
+            if exc is None:
+                self.failures = 0
+                self.failure_type = None
+                return
+            if type(exc) is not self.failure_type:
+                self.failures = 0
+                self.failure_type = type(exc)
+            self.failures += 1
+            if self.failures >= self.max_failures and self.reason is None:
+                self.reason = (
+                    "skipped after %s consecutive rows failed with %s (last: %s)"
+                    %(self.failures, self.failure_type.__name__, short_repr(str(exc)))
+                )
+
+    def call(self, func, *args, **kwargs):
+        self.check()
+        try:
+            result = func(*args, **kwargs)
+        except SkipTest:
+            raise
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record(None)
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        self.check()
+        try:
+            result = await func(*args, **kwargs)
+        except SkipTest:
+            raise
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record(None)
+        return result
+
+    def wrap(self, func):
+        """ Returns a function which runs ``func`` with this circuit
+            breaker. """
+        if inspect.iscoroutinefunction(func):
+            return partial(self.acall, func)
+        return partial(self.call, func)
+
+
+_row_hooks = []
+_row_hooks_configured = False
+
+
+def add_row_hook(hook):
+    """ Adds a hook which is called after each row of a parameterized test
+        runs::
+
+            hook(func, index, param, duration, peak_memory, outcome)
+
+        Where ``func`` is the test function, ``index`` is the number of the
+        row, ``duration`` is how long it took to run (in seconds),
+        ``peak_memory`` is the peak memory (in bytes) allocated while it ran
+        if ``tracemalloc`` is tracing (otherwise ``None``), and ``outcome``
+        is one of ``"passed"``, ``"failed"``, ``"error"`` or ``"skipped"``.
+
+        Tests are only instrumented if a hook has been added when their test
+        cases are generated, so hooks should be added before the tests are
+        imported.
+
+        Rows which are run together are reported too: rows run by
+        ``async_concurrency=`` are reported with their own duration, but
+        with a ``peak_memory`` of ``None`` (as they run concurrently), and
+        each row run by ``batch=`` is reported with the duration and peak
+        memory of its whole batch. """
+    _row_hooks.append(hook)
+
+
+def remove_row_hook(hook):
+    _row_hooks.remove(hook)
+
+
+def get_row_hooks():
+    """ Returns the hooks added with ``add_row_hook``. The first time it's
+        called, a ``RowProfileReporter`` is installed if the
+        ``PARAMETERIZED_PROFILE`` environment variable is set (to the path
+        the report should be written to). """
+    global _row_hooks_configured
+    if not _row_hooks_configured:
+        _row_hooks_configured = True
+        path = os.environ.get("PARAMETERIZED_PROFILE")
+        if path:
+            RowProfileReporter(path).install()
+    return _row_hooks
+
+
+class RowProfiler(object):
+    """ Runs one row of a parameterized test, measuring how long it takes and
+        how much memory it allocates, and passing the measurements to each of
+        the hooks added with ``add_row_hook``.
+
+        Note that rows run by ``workers`` are measured while the test waits
+        for their result. """
+
+    __slots__ = ("test_func", "index", "param", "trace_memory")
+
+    def __init__(self, test_func, index, p, trace_memory=True):
+        self.test_func = test_func
+        self.index = index
+        self.param = p
+        self.trace_memory = trace_memory
+
+    def start(self):
+        # Imported here (and below), as rows are only profiled when a row
+        # hook has been added.
+        import tracemalloc
+        if self.trace_memory and tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak"):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        else:
+            current = None
+        return current, time.perf_counter()
+
+    def finish(self, started, outcome):
+        import tracemalloc
+        start_memory, start_time = started
+        duration = time.perf_counter() - start_time
+        peak_memory = None
+        if start_memory is not None and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak_memory = max(peak - start_memory, 0)
+        for hook in list(_row_hooks):
+            hook(self.test_func, self.index, self.param, duration, peak_memory, outcome)
+
+    def get_outcome(self, exc):
+        if isinstance(exc, SkipTest):
+            return "skipped"
+        if isinstance(exc, AssertionError):
+            return "failed"
+        return "error"
+
+    def call(self, func, *args, **kwargs):
+        started = self.start()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.finish(started, self.get_outcome(e))
+            raise
+        self.finish(started, "passed")
+        return result
+
+    async def acall(self, func, *args, **kwargs):
+        started = self.start()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self.finish(started, self.get_outcome(e))
+            raise
+        self.finish(started, "passed")
+        return result
+
+    def wrap(self, func):
+        """ Returns a function which runs ``func`` with this profiler. """
+        if inspect.iscoroutinefunction(func):
+            return partial(self.acall, func)
+        return partial(self.call, func)
+
+
+class RowProfileReporter(object):
+    """ A row hook (see ``add_row_hook``) which records the rows of each
+        parameterized test, and writes the ``top`` slowest and most memory
+        hungry rows of each test to ``path`` (as CSV if ``path`` ends in
+        ``.csv``, otherwise as JSON)::
+
+            reporter = RowProfileReporter("row-profile.json").install()
+
+        ``install()`` adds the hook, starts ``tracemalloc`` (unless
+        ``trace_memory=False``) and writes the report when the interpreter
+        exits. Setting the ``PARAMETERIZED_PROFILE`` environment variable to
+        a path installs a reporter automatically. """
+
+    def __init__(self, path, top=10):
+        self.path = path
+        self.top = top
+        self.rows = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __call__(self, func, index, p, duration, peak_memory, outcome):
+        func = inspect.unwrap(func)
+        test_name = "%s.%s" %(func.__module__, func.__qualname__)
+        row = OrderedDict([
+            ("index", index),
+            ("param", self.format_param(p)),
+            ("duration", duration),
+            ("peak_memory", peak_memory),
+            ("outcome", outcome),
+        ])
+        with self.lock:
+            self.rows.setdefault(test_name, []).append(row)
+
+    def format_param(self, p):
+        return ", ".join(
+            [short_repr(arg) for arg in p.args] +
+            ["%s=%s" %(key, short_repr(value)) for (key, value) in p.kwargs.items()]
+        )
+
+    def install(self, trace_memory=True):
+        import tracemalloc
+        add_row_hook(self)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        atexit.register(self.write)
+        return self
+
+    def take_rows(self):
+        """ Returns (and forgets) the rows recorded so far, as
+            ``{test_name: rows}``, so they can be added to the reporter of
+            another process with ``add_rows`` (as ``python -m
+            parameterized.run`` does with the rows run by its workers). """
+        with self.lock:
+            rows, self.rows = self.rows, OrderedDict()
+        return rows
+
+    def add_rows(self, rows):
+        with self.lock:
+            for test_name, test_rows in rows.items():
+                self.rows.setdefault(test_name, []).extend(test_rows)
+
+    def get_report(self):
+        """ Returns ``{test_name: {"slowest": rows, "most_memory": rows}}``,
+            with the tests sorted by the duration of their slowest row. """
+        with self.lock:
+            tests = [(name, list(rows)) for (name, rows) in self.rows.items()]
+        report = OrderedDict()
+        tests.sort(key=lambda test: -max(row["duration"] for row in test[1]))
+        for name, rows in tests:
+            report[name] = OrderedDict([
+                ("slowest", sorted(rows, key=lambda row: -row["duration"])[:self.top]),
+                ("most_memory", sorted(
+                    [row for row in rows if row["peak_memory"] is not None],
+                    key=lambda row: -row["peak_memory"],
+                )[:self.top]),
+            ])
+        return report
+
+    def write(self):
+        report = self.get_report()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not self.path.endswith(".csv"):
+            with open(self.path, "w") as f:
+                json.dump(report, f, indent=2)
+            return
+        import csv
+        columns = ["test", "ranking", "rank", "index", "param", "duration", "peak_memory", "outcome"]
+        with open(self.path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for name, rankings in report.items():
+                for ranking, rows in rankings.items():
+                    for rank, row in enumerate(rows, 1):
+                        writer.writerow([name, ranking, rank] + list(row.values()))
+
+
+DEFAULT_INPUT_CACHE_SIZE = 256 * 1024 * 1024
+
+
+class CachedInput(object):
+    """ A callable input to ``@parameterized`` or ``parameterized.expand``
+        whose (checked) parameters are pickled to the ``tables`` directory
+        of ``get_cache_dir()``, and loaded from there when the tests are next
+        imported (see ``cached_input``).
+
+        The cache key is made from ``key``, the name of ``func``, and the
+        modification times and sizes of the file ``func`` is defined in and of
+        each of ``paths`` (files, or directories, which include every file in
+        them). Once the cached tables are larger than ``max_size`` bytes, the
+        least recently used are removed. """
+
+    def __init__(self, func, key, paths=(), max_size=DEFAULT_INPUT_CACHE_SIZE):
+        if isinstance(paths, string_types):
+            paths = [paths]
+        self.func = func
+        self.key = key
+        self.paths = list(paths)
+        self.max_size = max_size
+        wraps(func)(self)
+
+    def get_source_paths(self):
+        try:
+            source_path = inspect.getsourcefile(self.func)
+        except TypeError:
+            source_path = None
+        paths = [source_path] if source_path else []
+        for path in self.paths:
+            if os.path.isdir(path):
+                for dirpath, dirnames, filenames in os.walk(path):
+                    dirnames.sort()
+                    paths.extend(os.path.join(dirpath, name) for name in sorted(filenames))
+            else:
+                paths.append(path)
+        return paths
+
+    def get_cache_key(self):
+        digest = hashlib.sha1()
+        digest.update(repr((
+            self.key,
+            getattr(self.func, "__module__", None),
+            getattr(self.func, "__qualname__", None),
+        )).encode("utf-8"))
+        for path in self.get_source_paths():
+            try:
+                stat = os.stat(path)
+                version = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                version = None
+            digest.update(repr((path, version)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_table_dir(self):
+        return os.path.join(get_cache_dir(), "tables")
+
+    def __call__(self):
+        table_dir = self.get_table_dir()
+        path = os.path.join(table_dir, self.get_cache_key() + ".pickle")
+        try:
+            with open(path, "rb") as f:
+                params = pickle.load(f)
+            # The modification time of tables is used to evict the least
+            # recently used.
+            os.utime(path)
+            return params
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            warnings.warn("Ignoring invalid cached input %r: %s" %(path, e))
+
+        params = parameterized.check_input_values(self.func())
+        try:
+            data = pickle.dumps(params, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            warnings.warn(
+                "The input %r can't be cached, as its parameters can't be "
+                "pickled: %s" %(self.func, e),
+            )
+            return params
+        os.makedirs(table_dir, exist_ok=True)
+        # Written to a temporary file first, so other processes never load a
+        # partially written table.
+        fd, tmp_path = tempfile.mkstemp(dir=table_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict(table_dir, keep=path)
+        return params
+
+    def evict(self, table_dir, keep):
+        tables = []
+        for name in os.listdir(table_dir):
+            path = os.path.join(table_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            tables.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for (_, size, _) in tables)
+        for _, size, path in sorted(tables):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total_size -= size
+
+
+def cached_input(key, paths=(), max_size=DEFAULT_INPUT_CACHE_SIZE):
+    """ Decorates a function which returns the input to ``@parameterized`` or
+        ``parameterized.expand``, so its parameters are cached on disk (see
+        ``CachedInput``), and it's only called again when ``key``, or the
+        files in ``paths``, or the file it's defined in change::
+
+            @cached_input("fixtures-v1", paths=["fixtures/"])
+            def load_fixtures():
+                ...
+
+            class TestFixtures(TestCase):
+                @parameterized.expand(load_fixtures)
+                def test_fixture(self, name, fixture):
+                    ...
+
+        The parameters must be picklable. Caches can be removed with
+        ``python -m parameterized clear-cache``. """
+    return lambda func: CachedInput(func, key, paths=paths, max_size=max_size)
+
+
+def clear_cache(cache_dir=None):
+    """ Removes the cache directory (by default, ``get_cache_dir()``).
+        Returns ``True`` if it existed. """
+    cache_dir = cache_dir or get_cache_dir()
+    if not os.path.exists(cache_dir):
+        return False
+    shutil.rmtree(cache_dir)
+    return True
+
+
 _test_runner_override = None
 _test_runner_guess = False
 _test_runners = set(["unittest", "unittest2", "nose", "nose2", "pytest"])
@@ -358,6 +2226,70 @@ def set_test_runner(name):
     _test_runner_override = name
 
 
+class Shard(namedtuple("Shard", "index count")):
+    """ Shard ``index`` of ``count`` (counting from 1), which owns the test
+        cases whose ids (for example, ``test_module.TestClass.test_method_0``)
+        hash to it. """
+
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, value):
+        """ Parses a shard like ``"3/30"``. """
+        index, _, count = value.partition("/")
+        try:
+            index, count = int(index), int(count)
+        except ValueError:
+            raise ValueError(
+                "Invalid shard: %r (expected 'index/count', for example '3/30')"
+                %(value, ),
+            )
+        return cls.from_index(index, count)
+
+    @classmethod
+    def from_index(cls, index, count):
+        if not (0 < index <= count):
+            raise ValueError(
+                "Invalid shard: %r of %r (the index must be between 1 and the "
+                "number of shards)" %(index, count),
+            )
+        return cls(index, count)
+
+    def owns(self, test_id):
+        return zlib.crc32(test_id.encode("utf-8")) % self.count == self.index - 1
+
+
+_shard_override = None
+
+
+def set_shard(index, count=None):
+    """ Only generate the test cases of ``parameterized.expand`` and the
+        classes of ``parameterized_class`` which are owned by shard
+        ``index`` of ``count`` (counting from 1), so each of ``count`` CI
+        nodes only generates (and runs) its share of the tests. Test cases
+        are assigned to shards by a stable hash of their id, so every node
+        must be running the same tests.
+
+        The shard can also be set with the ``PARAMETERIZED_SHARD``
+        environment variable (for example, ``PARAMETERIZED_SHARD=3/30``).
+        ``set_shard(None)`` clears a shard set by ``set_shard``.
+
+        Must be called before the tests are imported. """
+    global _shard_override
+    _shard_override = None if index is None else Shard.from_index(index, count)
+
+
+def get_shard():
+    """ Returns the ``Shard`` set by ``set_shard`` or the
+        ``PARAMETERIZED_SHARD`` environment variable, or ``None``. """
+    if _shard_override is not None:
+        return _shard_override
+    value = os.environ.get("PARAMETERIZED_SHARD")
+    if not value:
+        return None
+    return Shard.parse(value)
+
+
 def detect_runner():
     """ Guess which test runner we're using by traversing the stack and looking
         for the first matching module. This *should* be reasonably safe, as
@@ -367,16 +2299,21 @@ def detect_runner():
         return _test_runner_override
     global _test_runner_guess
     if _test_runner_guess is False:
-        stack = inspect.stack()
-        for record in reversed(stack):
-            frame = record[0]
-            module = frame.f_globals.get("__name__").partition(".")[0]
+        # Walk the frames directly rather than using `inspect.stack()`, which
+        # reads the source code of every frame on the stack.
+        frames = []
+        frame = sys._getframe()
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        for frame in reversed(frames):
+            module = (frame.f_globals.get("__name__") or "").partition(".")[0]
             if module in _test_runner_aliases:
                 module = _test_runner_aliases[module]
             if module in _test_runners:
                 _test_runner_guess = module
                 break
-            if record[1].endswith("python2.6/unittest.py"):
+            if frame.f_code.co_filename.endswith("python2.6/unittest.py"):
                 _test_runner_guess = "unittest"
                 break
         else:
@@ -385,6 +2322,93 @@ def detect_runner():
 
 
 
+def all_pairs(columns):
+    """ Lazily yields rows (tuples with one value from each of ``columns``)
+        which, together, contain every pair of values from any two columns,
+        so every pairwise interaction is covered by far fewer rows than the
+        full product::
+
+            >>> list(all_pairs([[1, 2], ["a", "b"], [True, False]]))
+            [(1, 'a', True), (1, 'b', False), (2, 'a', False), (2, 'b', True)]
+
+        Rows are built greedily: each row starts with the first pair which
+        hasn't been covered yet, then each remaining column gets the value
+        which covers the most uncovered pairs. The output is deterministic.
+        """
+    if len(columns) < 2 or not all(columns):
+        for row in itertools.product(*columns):
+            yield row
+        return
+
+    column_pairs = list(itertools.combinations(range(len(columns)), 2))
+    # Pairs are tracked by value index, so values don't need to be hashable.
+    uncovered = set(
+        (i, a, j, b)
+        for (i, j) in column_pairs
+        for a in range(len(columns[i]))
+        for b in range(len(columns[j]))
+    )
+
+    def pair(k, c, m, v):
+        return (k, c, m, v) if k < m else (m, v, k, c)
+
+    while uncovered:
+        i, a, j, b = min(uncovered)
+        row = [None] * len(columns)
+        row[i] = a
+        row[j] = b
+        for k, column in enumerate(columns):
+            if row[k] is not None:
+                continue
+            row[k] = max(range(len(column)), key=lambda c: (
+                sum(
+                    pair(k, c, m, v) in uncovered
+                    for (m, v) in enumerate(row)
+                    if v is not None
+                ),
+                -c,
+            ))
+        for (i, j) in column_pairs:
+            uncovered.discard((i, row[i], j, row[j]))
+        yield tuple(column[v] for (column, v) in zip(columns, row))
+
+
+_executors = {
+    "thread": "ThreadPoolExecutor",
+    "process": "ProcessPoolExecutor",
+}
+
+
+def get_executor_class(executor):
+    """ Returns the ``concurrent.futures`` executor class named by
+        ``executor`` (one of ``_executors``). ``concurrent.futures`` is only
+        imported when it's needed, as it's slow to import. """
+    import concurrent.futures
+    return getattr(concurrent.futures, _executors[executor])
+
+
+def wait_for_future(future, *args, **kwargs):
+    return future.result()
+
+
+def call_parameterized_func(module_name, qualname, args, kwargs):
+    """ Calls the test function decorated by ``@parameterized`` which is named
+        ``qualname`` in module ``module_name``. Used to run rows in other
+        processes (``executor="process"``), as the original test function
+        can't be pickled. """
+    obj = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    test_func = getattr(obj, "parameterized_func", None)
+    if test_func is None:
+        raise TypeError(
+            "%s.%s is not a @parameterized test (hint: when using "
+            "executor=\"process\", @parameterized must be the outermost "
+            "decorator)" %(module_name, qualname),
+        )
+    return call_with_lazy_values(test_func, args, kwargs)
+
+
 class parameterized(object):
     """ Parameterize a test case::
 
@@ -404,15 +2428,77 @@ class parameterized(object):
             ])
             def test_add(a, b, expected):
                 assert_equal(a + b, expected)
+
+        By default the input is loaded into a list when the decorator is
+        applied. With ``stream=True`` it is instead consumed one row at a time
+        while the tests run, so a generator which reads a very large number of
+        cases from a file doesn't need to fit in memory (see
+        ``StreamingInput``)::
+
+            @parameterized(lambda: read_cases("cases.jsonl"), stream=True)
+            def test_case(input, expected):
+                ...
+
+        Rows which spend most of their time waiting (on subprocesses, sockets,
+        etc) can be run concurrently by a pool of ``workers`` threads (or, with
+        ``executor="process"``, processes). Each row is still reported as its
+        own test::
+
+            @parameterized(hosts, workers=8)
+            def test_ping(host):
+                subprocess.check_call(["ping", "-c", "1", host])
+
+        Note that rows are run ahead of the test runner, so ``setUp`` and
+        ``tearDown`` are not run around each row, and rows must not depend on
+        each other. With ``executor="process"``, the test function must be
+        defined at the top level of a module (or class), and the rows (and
+        test class instance) must be picklable.
+
+        With ``skip_unchanged=True``, rows which passed the last time they
+        ran are skipped, unless their parameters or the code of the test
+        function have changed since (see ``UnchangedRowGuard``).
+
+        With ``max_consecutive_failures=n``, once ``n`` rows in a row have
+        failed with the same type of exception, the remaining rows are
+        skipped (see ``CircuitBreaker``).
+
+        With ``lazy_doc=True``, the default docstrings are only built when
+        they're first used (see ``LazyDocstring``).
         """
 
-    def __init__(self, input, doc_func=None, skip_on_empty=False):
-        self.get_input = self.input_as_callable(input)
+    def __init__(self, input, doc_func=None, skip_on_empty=False, stream=False,
+                 workers=None, executor="thread", skip_unchanged=False,
+                 max_consecutive_failures=None, lazy_doc=False):
+        if executor not in _executors:
+            raise TypeError(
+                "Invalid executor: %r (must be one of: %s)"
+                %(executor, ", ".join(sorted(_executors))),
+            )
+        self.workers = workers
+        self.executor = executor
+        self.stream = stream
+        self.skip_unchanged = skip_unchanged
+        self.max_consecutive_failures = max_consecutive_failures
+        if max_consecutive_failures is not None:
+            # Validates max_consecutive_failures.
+            CircuitBreaker(max_consecutive_failures)
+        if stream:
+            streaming_input = StreamingInput(input)
+            self.get_input = lambda: streaming_input
+        else:
+            self.get_input = self.input_as_callable(input)
         self.doc_func = doc_func or default_doc_func
+        self.lazy_doc = lazy_doc
         self.skip_on_empty = skip_on_empty
 
     def __call__(self, test_func):
         self.assert_not_in_testcase_subclass()
+        if self.workers and self.executor == "process" and "<locals>" in test_func.__qualname__:
+            raise TypeError((
+                "@parameterized(..., executor=\"process\") can only be used "
+                "with functions which can be imported by name, but %r is "
+                "defined inside a function."
+            ) %(test_func, ))
 
         @wraps(test_func)
         def wrapper(test_self=None):
@@ -428,9 +2514,21 @@ class parameterized(object):
                     ) %(test_self, ))
 
             original_doc = wrapper.__doc__
-            for num, args in enumerate(wrapper.parameterized_input):
+            breaker = (
+                CircuitBreaker(self.max_consecutive_failures)
+                if self.max_consecutive_failures is not None else None
+            )
+            rows = enumerate(wrapper.parameterized_input)
+            if self.workers:
+                rows = self.run_rows_concurrently(test_self, test_func, rows, breaker)
+            else:
+                rows = ((num, args, None) for (num, args) in rows)
+            num = -1
+            for num, args, call in rows:
                 p = param.from_decorator(args)
-                unbound_func, nose_tuple = self.param_as_nose_tuple(test_self, test_func, num, p)
+                unbound_func, nose_tuple = self.param_as_nose_tuple(
+                    test_self, test_func, num, p, call=call, breaker=breaker,
+                )
                 try:
                     wrapper.__doc__ = nose_tuple[0].__doc__
                     # Nose uses `getattr(instance, test_func.__name__)` to get
@@ -446,8 +2544,19 @@ class parameterized(object):
                         delattr(test_cls, test_func.__name__)
                     wrapper.__doc__ = original_doc
 
+            # Streamed input can't be checked until it's consumed, so empty
+            # input is reported when the generator runs.
+            if num < 0 and self.stream:
+                if self.skip_on_empty:
+                    raise SkipTest("parameterized input is empty")
+                raise ValueError(
+                    "Parameters iterable is empty (hint: use "
+                    "`parameterized([], skip_on_empty=True, stream=True)` to "
+                    "skip this test when the input is empty)"
+                )
+
         input = self.get_input()
-        if not input:
+        if not (input or self.stream):
             if not self.skip_on_empty:
                 raise ValueError(
                     "Parameters iterable is empty (hint: use "
@@ -456,15 +2565,90 @@ class parameterized(object):
                 )
             wrapper = wraps(test_func)(skip_on_empty_helper)
 
+        if not self.stream:
+            # Streamed rows aren't known in advance, so their lazy values are
+            # only shared while they are in the cache.
+            for p in input:
+                _lazy_value_cache.acquire(find_lazy_values(p.args, p.kwargs))
+
         wrapper.parameterized_input = input
         wrapper.parameterized_func = test_func
         test_func.__name__ = "_parameterized_original_%s" %(test_func.__name__, )
 
         return wrapper
 
-    def param_as_nose_tuple(self, test_self, func, num, p):
-        nose_func = wraps(func)(lambda *args: func(*args[:-1], **args[-1]))
-        nose_func.__doc__ = self.doc_func(func, num, p)
+    def run_rows_concurrently(self, test_self, test_func, rows, breaker=None):
+        """ Submits ``rows`` (``(num, args)`` pairs) to a pool of workers,
+            yielding ``(num, param, call)`` for each row, where ``call`` waits
+            for the row to finish, re-raising any exception it raised.
+
+            Only a few rows per worker are submitted ahead of the row being
+            yielded, so streamed input isn't loaded into memory. Rows aren't
+            submitted once the ``CircuitBreaker`` ``breaker`` is open (but
+            they're still read from the input one at a time). """
+        pool = get_executor_class(self.executor)(max_workers=self.workers)
+        pending = deque()
+        try:
+            for num, args in rows:
+                p = param.from_decorator(args)
+                guard = None
+                if self.skip_unchanged:
+                    guard = UnchangedRowGuard(test_func, p, test_cls=test_self and type(test_self))
+                if guard is not None and guard.unchanged():
+                    # The guard raises SkipTest without running the row.
+                    pending.append((num, p, None, partial(guard.call, None)))
+                elif breaker is not None and breaker.is_open():
+                    pending.append((num, p, None, partial(breaker.call, None)))
+                else:
+                    pending.append(self.submit_row(pool, test_self, test_func, num, p, guard))
+                # Rows which aren't run are still queued behind the rows
+                # which are, so they're drained the same way.
+                if len(pending) > self.workers * 2:
+                    num, p, _, call = pending.popleft()
+                    yield num, p, call
+            while pending:
+                num, p, _, call = pending.popleft()
+                yield num, p, call
+        finally:
+            for (_, _, future, _) in pending:
+                if future is not None:
+                    future.cancel()
+            pool.shutdown(wait=True)
+
+    def submit_row(self, pool, test_self, test_func, num, p, guard=None):
+        """ Submits a row to ``pool``, returning ``(num, param, future,
+            call)``. """
+        args = p.args if test_self is None else (test_self, ) + p.args
+        if self.executor == "process":
+            future = pool.submit(
+                call_parameterized_func, test_func.__module__,
+                test_func.__qualname__, args, dict(p.kwargs),
+            )
+            # Lazy values are built by the worker process, using its own
+            # cache.
+            _lazy_value_cache.release(find_lazy_values(p.args, p.kwargs))
+        else:
+            future = pool.submit(call_with_lazy_values, test_func, args, p.kwargs)
+        call = partial(wait_for_future, future)
+        if guard is not None:
+            call = partial(guard.call, call)
+        return num, p, future, call
+
+    def param_as_nose_tuple(self, test_self, func, num, p, call=None, breaker=None):
+        # `call` is what's actually called to run the test, if it isn't `func`
+        # itself (for example, when the row is run by a pool of workers).
+        if call is None:
+            if find_lazy_values(p.args, p.kwargs):
+                call = lambda *args, **kwargs: call_with_lazy_values(func, args, kwargs)
+            if self.skip_unchanged:
+                call = UnchangedRowGuard(func, p).wrap(call or func)
+        if breaker is not None:
+            call = breaker.wrap(call or func)
+        if get_row_hooks():
+            call = RowProfiler(func, num, p).wrap(call or func)
+        call = call or func
+        nose_func = wraps(func)(lambda *args: call(*args[:-1], **args[-1]))
+        nose_func.__doc__ = make_doc(self.doc_func, func, num, p, lazy=self.lazy_doc)
         # Track the unbound function because we need to setattr the unbound
         # function onto the class for nose to work (see comments above), and
         # Python 3 doesn't let us pull the function out of a bound method.
@@ -479,7 +2663,7 @@ class parameterized(object):
                 test_self
             )
             nose_func = make_method(nose_func, func_self, type(test_self))
-        return unbound_func, (nose_func, ) + p.args + (p.kwargs or {}, )
+        return unbound_func, (nose_func, ) + p.args + (p.kwargs or EMPTY_KWARGS, )
 
     def assert_not_in_testcase_subclass(self):
         parent_classes = self._terrible_magic_get_defining_classes()
@@ -493,17 +2677,31 @@ class parameterized(object):
             Will likely only work if called from the ``parameterized`` decorator.
             This function is entirely @brandon_rhodes's fault, as he suggested
             the implementation: http://stackoverflow.com/a/8793684/71522
+
+            Frames are looked up directly (instead of with ``inspect.stack()``,
+            which reads the source of every frame on the stack), and the
+            source of the ``class`` statement is only read when the decorator
+            is being applied in a class body.
             """
-        stack = inspect.stack()
-        if len(stack) <= 4:
+        try:
+            # 0: this method, 1: assert_not_in_testcase_subclass, 2: __call__,
+            # 3: the class body, 4: the frame executing the class statement.
+            class_body = sys._getframe(3)
+            frame = sys._getframe(4)
+        except ValueError:
+            return []
+        # Class bodies are the only frames with these names in their locals.
+        class_locals = class_body.f_locals
+        if not ("__qualname__" in class_locals and "__module__" in class_locals):
             return []
-        frame = stack[4]
-        code_context = frame[4] and frame[4][0].strip()
-        if not (code_context and code_context.startswith("class ")):
+        code_context = linecache.getline(
+            frame.f_code.co_filename, frame.f_lineno, frame.f_globals,
+        ).strip()
+        if not code_context.startswith("class "):
             return []
         _, _, parents = code_context.partition("(")
         parents, _, _ = parents.partition(")")
-        return eval("[" + parents + "]", frame[0].f_globals, frame[0].f_locals)
+        return eval("[" + parents + "]", frame.f_globals, frame.f_locals)
 
     @classmethod
     def input_as_callable(cls, input):
@@ -525,7 +2723,10 @@ class parameterized(object):
 
     @classmethod
     def expand(cls, input, name_func=None, doc_func=None, skip_on_empty=False,
-               namespace=None, **legacy):
+               namespace=None, lazy=False, async_concurrency=None,
+               batch_name_func=None, skip_unchanged=False, batch=None,
+               batch_stack=None, max_consecutive_failures=None, lazy_doc=False,
+               **legacy):
         """ A "brute force" method of parameterizing test cases. Creates new
             test cases and injects them into the namespace that the wrapped
             function is being defined in. Useful for parameterizing tests in
@@ -537,6 +2738,13 @@ class parameterized(object):
                 the name of the test case. If not provided, the name of the
                 test case will be the name of the test function with the
                 parameter value appended.
+            :param batch_name_func: An alternative to ``name_func`` which names
+                every test case with a single call:
+                ``batch_name_func(func, nums, params)``, where ``nums`` are the
+                (zero padded) numbers of the test cases, and ``params`` are
+                their parameters, and which returns a list with the name of
+                each test case. Useful when names can be generated more
+                efficiently all at once, or depend on the other test cases.
             :param doc_func: A function that takes a single argument (the
                 value from the input iterable) and returns a string to use as
                 the docstring of the test case. If not provided, the docstring
@@ -547,6 +2755,43 @@ class parameterized(object):
             :param namespace: The namespace (dict-like) to inject the test cases
                 into. If not provided, the namespace of the test function will
                 be used.
+            :param lazy: If True, the test cases are only built when they are
+                first looked up (for example, by the test runner's loader).
+                Every test name is still added to the namespace, so discovery
+                is unaffected. This requires a runner which looks test methods
+                up with ``getattr`` (unittest, nose, or py.test running
+                ``TestCase`` subclasses).
+            :param async_concurrency: If set, the test must be a coroutine
+                function, and the first of its test cases to run will run all
+                of them concurrently in a single, shared event loop, with at
+                most ``async_concurrency`` rows running at once (instead of
+                creating an event loop for each row). Each test case then
+                reports the outcome of its own row. Note that every row is
+                passed the ``self`` of the first test case to run, so rows
+                can't rely on per-test state from ``setUp`` or
+                ``asyncSetUp``, and that ``mock.patch`` is not supported.
+            :param skip_unchanged: If True, test cases which passed the last
+                time they ran are skipped, unless their parameters or the code
+                of the test function have changed since (see
+                ``UnchangedRowGuard``).
+            :param batch: If set, the rows are run in batches of (at most)
+                ``batch`` rows, with a single call to the test function, which
+                is passed each argument as a column of values, one for each
+                row, and returns the outcome of each row (see
+                ``VectorizedRowBatch``). Each row is still reported as its own
+                test case. Every row of a batch is passed the ``self`` of the
+                first of its test cases to run.
+            :param batch_stack: A function used to convert each column of a
+                batch (a list) before it's passed to the test function (for
+                example, ``numpy.asarray``).
+            :param max_consecutive_failures: If set, once this many test cases
+                in a row have failed with the same type of exception, the
+                remaining test cases are skipped (see ``CircuitBreaker``).
+            :param lazy_doc: If True, the default docstrings are only built
+                the first time they're used (for example, when the test runner
+                reports the test in verbose mode), as a string-like
+                ``LazyDocstring``, which isn't a ``str`` (see
+                ``LazyDocstring``).
 
             >>> @parameterized.expand([("foo", 1, 2)])
             ... def test_add1(name, input, expected):
@@ -570,6 +2815,26 @@ class parameterized(object):
             if not doc_func:
                 doc_func = legacy["testcase_func_doc"]
 
+        if name_func is not None and batch_name_func is not None:
+            raise TypeError("name_func= and batch_name_func= can't both be used")
+
+        if batch is not None:
+            if async_concurrency is not None or skip_unchanged:
+                raise TypeError(
+                    "batch= can't be used with async_concurrency= or skip_unchanged="
+                )
+            if batch < 1:
+                raise ValueError("batch= must be at least 1, not %r" %(batch, ))
+
+        if max_consecutive_failures is not None:
+            if async_concurrency is not None or batch is not None:
+                raise TypeError(
+                    "max_consecutive_failures= can't be used with "
+                    "async_concurrency= or batch="
+                )
+            # Validates max_consecutive_failures.
+            CircuitBreaker(max_consecutive_failures)
+
         doc_func = doc_func or default_doc_func
         name_func = name_func or default_name_func
 
@@ -589,16 +2854,132 @@ class parameterized(object):
                     )
                 return wraps(f)(skip_on_empty_helper)
 
+            # Keep a copy of the original patches: lazily built test cases
+            # are created after they have been removed from `f` (see below).
+            patchings = getattr(f, "patchings", None)
+            if patchings is not None:
+                patchings = list(patchings)
+                patch_template = PatchTemplate(f, patchings)
+
+            breaker = None
+            if max_consecutive_failures is not None:
+                breaker = CircuitBreaker(max_consecutive_failures)
+
+            if async_concurrency is not None:
+                if not inspect.iscoroutinefunction(f):
+                    raise TypeError(
+                        "async_concurrency= can only be used with coroutine "
+                        "functions, but %r is not a coroutine function" %(f, )
+                    )
+                if patchings is not None:
+                    raise TypeError(
+                        "async_concurrency= can't be used with `mock.patch` "
+                        "(rows running concurrently would share the patches)"
+                    )
+
+            if batch is not None:
+                if inspect.iscoroutinefunction(f):
+                    raise TypeError(
+                        "batch= can't be used with coroutine functions, but %r "
+                        "is a coroutine function" %(f, )
+                    )
+                if patchings is not None:
+                    raise TypeError("batch= can't be used with `mock.patch`")
+
+            def materialize(num, p, name):
+                _lazy_value_cache.acquire(find_lazy_values(p.args, p.kwargs))
+                if num in row_batches:
+                    row_batch, index = row_batches[num]
+                    standalone_func = cls.param_as_batched_func(row_batch, index, f, name)
+                    standalone_func.__doc__ = make_doc(doc_func, f, num, p, lazy=lazy_doc)
+                    return standalone_func
+                call = None
+                if patchings is not None:
+                    # If the original function has patches applied by
+                    # 'mock.patch', each new function gets its own copy of
+                    # them, so as not to share patch objects between new
+                    # functions (see PatchTemplate).
+                    row_patchings = patch_template.new_patchings()
+                    call = patch_template.patched_func(row_patchings)
+                if skip_unchanged:
+                    call = UnchangedRowGuard(f, p).wrap(call or f)
+                if breaker is not None:
+                    call = breaker.wrap(call or f)
+                if get_row_hooks():
+                    call = RowProfiler(f, num, p).wrap(call or f)
+                standalone_func = cls.param_as_standalone_func(p, f, name, call=call)
+                if patchings is not None:
+                    standalone_func.patchings = row_patchings
+                standalone_func.__doc__ = make_doc(doc_func, f, num, p, lazy=lazy_doc)
+                return standalone_func
+
             digits = len(str(len(parameters) - 1))
-            for num, p in enumerate(parameters):
-                name = name_func(f, "{num:0>{digits}}".format(digits=digits, num=num), p)
-                # If the original function has patches applied by 'mock.patch',
-                # re-construct all patches on the just former decoration layer
-                # of param_as_standalone_func so as not to share
-                # patch objects between new functions
-                nf = reapply_patches_if_need(f)
-                frame_locals[name] = cls.param_as_standalone_func(p, nf, name)
-                frame_locals[name].__doc__ = doc_func(f, num, p)
+            nums = [str(num).zfill(digits) for num in range(len(parameters))]
+            if batch_name_func is not None:
+                names = list(batch_name_func(f, nums, parameters))
+                if len(names) != len(parameters):
+                    raise ValueError(
+                        "batch_name_func returned %s names for %s test cases"
+                        %(len(names), len(parameters)),
+                    )
+            else:
+                names = [name_func(f, num, p) for (num, p) in zip(nums, parameters)]
+
+            rows = [(num, p, name) for (num, (p, name)) in enumerate(zip(parameters, names))]
+            unowned_rows = []
+            shard = get_shard()
+            if shard is not None:
+                # Only the test cases owned by this shard are generated. The
+                # others of a test method are kept (lazily) in
+                # `__parameterized_unowned_tests__`, as its class may be
+                # decorated with parameterized_class, which shards the test
+                # cases of each class it generates by their own ids.
+                class_name, _, _ = f.__qualname__.rpartition(".")
+                id_prefix = ".".join(x for x in [f.__module__, class_name] if x) + "."
+                owned_rows = []
+                for row in rows:
+                    if shard.owns(id_prefix + row[2]):
+                        owned_rows.append(row)
+                    elif class_name:
+                        unowned_rows.append(row)
+                rows = owned_rows
+
+            # Maps the number of each row which is run in a batch to its
+            # batch, and its index in the batch.
+            row_batches = {}
+            row_groups = [group for group in [rows, unowned_rows] if group]
+            if async_concurrency is not None:
+                batch_rows = row_groups
+                make_batch = lambda nums, params: AsyncRowBatch(
+                    f, params, async_concurrency, skip_unchanged=skip_unchanged, nums=nums,
+                )
+            elif batch is not None:
+                batch_rows = [
+                    group[i:i + batch]
+                    for group in row_groups
+                    for i in range(0, len(group), batch)
+                ]
+                make_batch = lambda nums, params: VectorizedRowBatch(
+                    f, params, stack=batch_stack, nums=nums,
+                )
+            else:
+                batch_rows = []
+            for chunk in batch_rows:
+                row_batch = make_batch(
+                    [num for (num, _, _) in chunk], [p for (_, p, _) in chunk],
+                )
+                for index, (num, _, _) in enumerate(chunk):
+                    row_batches[num] = (row_batch, index)
+
+            for num, p, name in rows:
+                if lazy:
+                    frame_locals[name] = LazyExpandedFunc(materialize, num, p, name)
+                else:
+                    frame_locals[name] = materialize(num, p, name)
+            if shard is not None and class_name:
+                unowned_tests = frame_locals.setdefault("__parameterized_unowned_tests__", {})
+                for num, p, name in unowned_rows:
+                    unowned_tests[name] = LazyExpandedFunc(materialize, num, p, name)
 
             # Delete original patches to prevent new function from evaluating
             # original patching object as well as re-constructed patches.
@@ -609,16 +2990,44 @@ class parameterized(object):
         return parameterized_expand_wrapper
 
     @classmethod
-    def param_as_standalone_func(cls, p, func, name):
-        if inspect.iscoroutinefunction(func):
+    def param_as_standalone_func(cls, p, func, name, call=None):
+        # `call` is what's actually called to run the test, if it isn't `func`
+        # itself (for example, when patches are applied to it).
+        call = call or func
+        if find_lazy_values(p.args, p.kwargs):
+            if inspect.iscoroutinefunction(func):
+                @wraps(func)
+                async def standalone_func(*a, **kw):
+                    with lazy_values_resolved(p.args, p.kwargs) as (args, kwargs):
+                        return await call(*(a + args), **kwargs, **kw)
+            else:
+                @wraps(func)
+                def standalone_func(*a, **kw):
+                    with lazy_values_resolved(p.args, p.kwargs) as (args, kwargs):
+                        return call(*(a + args), **kwargs, **kw)
+        elif inspect.iscoroutinefunction(func):
             @wraps(func)
             async def standalone_func(*a, **kw):
-                return await func(*(a + p.args), **p.kwargs, **kw)
+                return await call(*(a + p.args), **p.kwargs, **kw)
         else:
             @wraps(func)
             def standalone_func(*a, **kw):
-                return func(*(a + p.args), **p.kwargs, **kw)
+                return call(*(a + p.args), **p.kwargs, **kw)
+
+        return cls.prepare_standalone_func(standalone_func, func, name)
 
+    @classmethod
+    def param_as_batched_func(cls, batch, index, func, name):
+        """ Returns a test function which reports the outcome of row ``index``
+            of a ``RowBatch``. """
+        @wraps(func)
+        def standalone_func(*a, **kw):
+            return batch.get_outcome(index, a, kw)
+
+        return cls.prepare_standalone_func(standalone_func, func, name)
+
+    @classmethod
+    def prepare_standalone_func(cls, standalone_func, func, name):
         standalone_func.__name__ = name
 
         # place_as is used by py.test to determine what source file should be
@@ -634,14 +3043,250 @@ class parameterized(object):
             pass
         return standalone_func
 
+    @classmethod
+    def batched(cls, input, size, stack=None, **kwargs):
+        """ A shortcut for ``parameterized.expand(input, batch=size,
+            batch_stack=stack, ...)``, which runs the rows in batches of
+            ``size`` with a single call to the test function::
+
+                class TestSqrt(TestCase):
+                    @parameterized.batched([
+                        (4, 2),
+                        (9, 3),
+                    ], size=1000, stack=numpy.asarray)
+                    def test_sqrt(self, input, expected):
+                        # Return whether each row passed
+                        return numpy.sqrt(input) == expected
+            """
+        return cls.expand(input, batch=size, batch_stack=stack, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path, columns=None, converters=None, **kwargs):
+        """ Returns the rows of the CSV file at ``path``, as ``param``s with
+            a keyword argument for each column::
+
+                # cases.csv:
+                # input,expected
+                # 1,2
+                # 41,42
+                @parameterized.expand(parameterized.from_csv(
+                    "cases.csv", converters={"input": int, "expected": int},
+                ))
+                def test_add1(self, input, expected):
+                    ...
+
+            The file is memory mapped and its rows are only decoded when they
+            are used (see ``TableSource``), so large files aren't loaded into
+            memory. ``columns`` is a list of the columns to use, or a dict
+            mapping column names to argument names, and ``converters`` maps
+            column names to functions which convert their (string) values.
+            Other keyword arguments are passed to ``CsvSource``.
+            """
+        return CsvSource(path, columns=columns, converters=converters, **kwargs)
+
+    @classmethod
+    def from_jsonl(cls, path, columns=None, converters=None, **kwargs):
+        """ Returns the rows of the JSON lines file at ``path`` (which has a
+            JSON object on each line) as ``param``s with a keyword argument
+            for each key. Like ``parameterized.from_csv``, rows are only
+            decoded when they are used. """
+        return JsonLinesSource(path, columns=columns, converters=converters, **kwargs)
+
+    @classmethod
+    def product(cls, *args, **kwargs):
+        """ Lazily generates a ``param`` for every combination of the values
+            of each of ``args`` (which become positional arguments) and
+            ``kwargs`` (which become keyword arguments)::
+
+                >>> list(parameterized.product([1, 2], b=["x", "y"]))
+                [param(*(1,), **{'b': 'x'}), param(*(1,), **{'b': 'y'}),
+                 param(*(2,), **{'b': 'x'}), param(*(2,), **{'b': 'y'})]
+
+                @parameterized.expand(parameterized.product(
+                    encoding=["utf-8", "latin1"],
+                    size=[0, 1, 1024],
+                ))
+                def test_roundtrip(self, encoding, size):
+                    ...
+            """
+        return cls._combinations_as_params(itertools.product, args, kwargs)
+
+    @classmethod
+    def pairwise(cls, *args, **kwargs):
+        """ Like ``parameterized.product``, but only generates enough params
+            to cover every pair of values from any two arguments (an
+            "all-pairs" covering array; see ``all_pairs``). This is usually a
+            tiny fraction of the full product: for example, 10 arguments with
+            4 values each have over a million combinations, but all pairs are
+            covered by a few dozen params::
+
+                >>> list(parameterized.pairwise(a=[1, 2], b=["x", "y"], c=[True, False]))
+                [param(*(), **{'a': 1, 'b': 'x', 'c': True}),
+                 param(*(), **{'a': 1, 'b': 'y', 'c': False}),
+                 param(*(), **{'a': 2, 'b': 'x', 'c': False}),
+                 param(*(), **{'a': 2, 'b': 'y', 'c': True})]
+            """
+        return cls._combinations_as_params(
+            lambda *columns: all_pairs([list(c) for c in columns]),
+            args,
+            kwargs,
+        )
+
+    @classmethod
+    def _combinations_as_params(cls, combinations, args, kwargs):
+        names = list(kwargs)
+        num_args = len(args)
+        combos = combinations(*(list(args) + [kwargs[name] for name in names]))
+        for values in combos:
+            yield param.explicit(values[:num_args], dict(zip(names, values[num_args:])))
+
     @classmethod
     def to_safe_name(cls, s):
         if not isinstance(s, str):
             s = str(s)
-        return str(re.sub("[^a-zA-Z0-9_]+", "_", s))
+        if len(s) > _SAFE_NAME_CACHE_MAX_LENGTH:
+            return str(_unsafe_name_chars.sub("_", s))
+        return _cached_safe_name(s)
+
+
+class LazyClasses(object):
+    """ The classes generated by ``parameterized_class(..., lazy=True)`` in
+        one module, which are only created when they are first looked up.
+
+        The module's ``__getattr__`` and ``__dir__`` (see PEP 562) are
+        replaced, so ``getattr(module, name)`` creates (and stores in the
+        module) the class named ``name``, and ``dir(module)`` includes the
+        names of the classes which haven't been created yet. Any
+        ``__getattr__`` or ``__dir__`` the module already defined is still
+        used for other names. """
+
+    def __init__(self, module_dict):
+        self.module_dict = module_dict
+        self.factories = OrderedDict()
+        self.lock = threading.RLock()
+        self.module_getattr = module_dict.get("__getattr__")
+        self.module_dir = module_dict.get("__dir__")
+        module_dict["__getattr__"] = self.getattr
+        module_dict["__dir__"] = self.dir
 
+    @classmethod
+    def for_module(cls, module_dict):
+        lazy_classes = module_dict.get("__parameterized_lazy_classes__")
+        if lazy_classes is None:
+            lazy_classes = module_dict["__parameterized_lazy_classes__"] = cls(module_dict)
+        return lazy_classes
+
+    def add(self, name, factory):
+        with self.lock:
+            self.factories[name] = factory
+
+    def getattr(self, name):
+        with self.lock:
+            factory = self.factories.pop(name, None)
+            if factory is not None:
+                value = self.module_dict[name] = factory()
+                return value
+            if name in self.module_dict:
+                return self.module_dict[name]
+        if self.module_getattr is not None:
+            return self.module_getattr(name)
+        raise AttributeError("module %r has no attribute %r" %(
+            self.module_dict.get("__name__"), name,
+        ))
+
+    def dir(self):
+        names = self.module_dir() if self.module_dir is not None else self.module_dict
+        with self.lock:
+            return sorted(set(names) | set(self.factories))
+
+
+class SharedClassSetup(object):
+    """ The shared class setup of a group of classes generated by
+        ``parameterized_class(..., shared_setup_attrs=...)`` which have the
+        same values for ``shared_setup_attrs``.
+
+        The first class of the group to run calls ``setUpSharedClass()`` on
+        itself, and the attributes in the dict it returns are set on every
+        class in the group as it's set up. ``tearDownSharedClass()`` is called
+        (on the class which set it up) once every class in the group has been
+        torn down, or when the interpreter exits (or ``shutdown()`` is called)
+        if some never run (for example, because only some of them were
+        selected). If the setup
+        fails, the error is raised by every class in the group, without
+        trying to set it up again. """
+
+    def __init__(self):
+        self.remaining = 0
+        self.owner = None
+        self.attrs = None
+        self.error = None
+        self.lock = threading.RLock()
+
+    def add_class(self):
+        self.remaining += 1
+
+    def set_up(self, cls):
+        with self.lock:
+            if self.error is not None:
+                self.remaining -= 1
+                raise self.error
+            if self.owner is None:
+                try:
+                    self.attrs = cls.setUpSharedClass() or {}
+                except BaseException as e:
+                    self.error = e
+                    self.remaining -= 1
+                    raise
+                self.owner = cls
+                add_shutdown_hook(self.tear_down)
+            for name, value in self.attrs.items():
+                setattr(cls, name, value)
+
+    def release(self):
+        with self.lock:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.tear_down()
+
+    def tear_down(self):
+        with self.lock:
+            owner, self.owner = self.owner, None
+            if owner is None:
+                return
+            remove_shutdown_hook(self.tear_down)
+            owner.tearDownSharedClass()
+
+    def class_methods(self, base_class):
+        """ Returns the ``setUpClass`` and ``tearDownClass`` of the classes
+            in the group, which wrap those of ``base_class``, along with
+            ``__parameterized_shared_setup__`` (the group, so runners which
+            split classes between processes can keep it in one process). """
+        group = self
+
+        def setUpClass(cls):
+            group.set_up(cls)
+            try:
+                base_class.setUpClass.__func__(cls)
+            except BaseException:
+                # unittest doesn't call tearDownClass when setUpClass fails.
+                group.release()
+                raise
 
-def parameterized_class(attrs, input_values=None, class_name_func=None, classname_func=None):
+        def tearDownClass(cls):
+            try:
+                base_class.tearDownClass.__func__(cls)
+            finally:
+                group.release()
+
+        return {
+            "setUpClass": classmethod(setUpClass),
+            "tearDownClass": classmethod(tearDownClass),
+            "__parameterized_shared_setup__": self,
+        }
+
+
+def parameterized_class(attrs, input_values=None, class_name_func=None, classname_func=None,
+                        lazy=False, shared_setup_attrs=None):
     """ Parameterizes a test class by setting attributes on the class.
 
         Can be used in two ways:
@@ -664,6 +3309,39 @@ def parameterized_class(attrs, input_values=None, class_name_func=None, classnam
             class TestUserAccessLevel(TestCase):
                 ...
 
+        With ``lazy=True``, each class is only created when it's first looked
+        up as an attribute of its module (see ``LazyClasses``). Loading every
+        test in the module (for example, with ``python -m unittest module``,
+        discovery, or ``-k``) still looks up, and creates, every class; only
+        selecting classes or tests by their dotted names (for example,
+        ``python -m unittest module.TestClass_42``) avoids creating the
+        others. This requires a runner which finds tests with
+        ``dir(module)`` and ``getattr(module, name)`` (unittest, nose, or
+        py.test, which creates every class when it collects the module), and
+        the generated classes can't be referred to by name in the module's own
+        code.
+
+        With ``shared_setup_attrs``, a tuple of attribute names, classes with
+        the same values for those attributes share an expensive class setup,
+        which is run once for the group by the ``setUpSharedClass`` class
+        method of the base class. It returns a dict of attributes to set on
+        each class in the group, and ``tearDownSharedClass`` is called after
+        the last class in the group is torn down (see ``SharedClassSetup``)::
+
+            @parameterized_class(("database", "user"), [
+                ("postgres", "alice"),
+                ("postgres", "bob"),
+                ("sqlite", "alice"),
+            ], shared_setup_attrs=("database", ))
+            class TestQueries(TestCase):
+                @classmethod
+                def setUpSharedClass(cls):
+                    return {"server": start_server(cls.database)}
+
+                @classmethod
+                def tearDownSharedClass(cls):
+                    cls.server.stop()
+
     """
 
     if isinstance(attrs, string_types):
@@ -685,15 +3363,61 @@ def parameterized_class(attrs, input_values=None, class_name_func=None, classnam
         )
         class_name_func = lambda cls, idx, input: classname_func(cls, idx, input_dicts)
 
+    if isinstance(shared_setup_attrs, string_types):
+        shared_setup_attrs = [shared_setup_attrs]
+
     def decorator(base_class):
         test_class_module = sys.modules[base_class.__module__].__dict__
+        if shared_setup_attrs is not None:
+            for method_name in ["setUpSharedClass", "tearDownSharedClass"]:
+                if not hasattr(base_class, method_name):
+                    raise TypeError(
+                        "parameterized_class(..., shared_setup_attrs=...) "
+                        "requires %r to define a %s classmethod"
+                        %(base_class, method_name),
+                    )
+            shared_setups = {}
+        if lazy:
+            lazy_classes = LazyClasses.for_module(test_class_module)
+        shard = get_shard()
+        # The test cases generated by `parameterized.expand` which weren't
+        # owned by this shard under the base class's name.
+        unowned_tests = base_class.__dict__.get("__parameterized_unowned_tests__")
         for idx, input_dict in enumerate(input_dicts):
+            name = class_name_func(base_class, idx, input_dict)
+            class_id = base_class.__module__ + "." + name
+
             test_class_dict = dict(base_class.__dict__)
+            if shard is not None and unowned_tests is not None:
+                # Test cases are sharded by their final ids, so each
+                # (class, row) runs in exactly one shard.
+                del test_class_dict["__parameterized_unowned_tests__"]
+                test_class_dict.update(unowned_tests)
+                for method_name in list(test_class_dict):
+                    if method_name.startswith("test") and not shard.owns(class_id + "." + method_name):
+                        del test_class_dict[method_name]
+                if not any(method_name.startswith("test") for method_name in test_class_dict):
+                    continue
+            elif shard is not None and not shard.owns(class_id):
+                continue
             test_class_dict.update(input_dict)
 
-            name = class_name_func(base_class, idx, input_dict)
-
-            test_class_module[name] = type(name, (base_class, ), test_class_dict)
+            if shared_setup_attrs is not None:
+                group_values = [
+                    test_class_dict.get(attr, getattr(base_class, attr, None))
+                    for attr in shared_setup_attrs
+                ]
+                group_key = json.dumps(canonicalize(group_values), sort_keys=True)
+                shared_setup = shared_setups.get(group_key)
+                if shared_setup is None:
+                    shared_setup = shared_setups[group_key] = SharedClassSetup()
+                shared_setup.add_class()
+                test_class_dict.update(shared_setup.class_methods(base_class))
+
+            if lazy:
+                lazy_classes.add(name, partial(type, name, (base_class, ), test_class_dict))
+            else:
+                test_class_module[name] = type(name, (base_class, ), test_class_dict)
 
         # We need to leave the base class in place (see issue #73), but if we
         # leave the test_ methods in place, the test runner will try to pick
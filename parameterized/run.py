@@ -0,0 +1,330 @@
+""" Runs unittest tests in a pool of processes, so the classes generated by
+    ``parameterized_class`` (and the test cases generated by
+    ``parameterized.expand``) use every core::
+
+        $ python -m parameterized.run
+        $ python -m parameterized.run -j 16 test_math test_strings.TestUpper
+
+    Tests are found the same way as ``python -m unittest`` (by discovering
+    ``test*.py`` in the current directory, unless test names are given), and
+    each test class is run by one worker, so ``setUpClass`` and
+    ``tearDownClass`` are still run once per class (but ``setUpModule`` and
+    ``tearDownModule`` are run around each class). The classes which share
+    a class setup (see ``parameterized_class(..., shared_setup_attrs=...)``)
+    are all run by the same worker.
+
+    Each worker commits the results of ``skip_unchanged`` tests after each
+    class, and calls ``shutdown()`` before it exits (as workers don't run
+    ``atexit`` handlers). The rows recorded by a ``RowProfileReporter`` in
+    the workers are sent back, and reported by the reporter of the main
+    process.
+
+    How long each class took is saved in ``durations.json`` in
+    ``get_cache_dir()``, and the slowest classes are started first on the
+    next run, so the workers finish at about the same time.
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import unittest
+import multiprocessing.util
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .parameterized import (
+    get_cache_dir, get_result_cache, get_row_hooks, shutdown,
+    RowProfileReporter,
+)
+
+
+def load_tests(names, start_directory=".", pattern="test*.py"):
+    """ Loads the tests, the same way as ``python -m unittest``. """
+    loader = unittest.TestLoader()
+    if names:
+        return loader.loadTestsFromNames(names)
+    return loader.discover(start_directory, pattern=pattern)
+
+
+def iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for test in iter_tests(test):
+                yield test
+        else:
+            yield test
+
+
+def group_tests_by_class(suite):
+    """ Returns ``{class_name: [test_id, ...]}``, in the order the tests were
+        loaded. The tests of classes which share a class setup are grouped
+        under the name of the first of them, as they must be run by the same
+        worker. """
+    groups = OrderedDict()
+    shared_setup_names = {}
+    for test in iter_tests(suite):
+        class_name, _, _ = test.id().rpartition(".")
+        shared_setup = getattr(type(test), "__parameterized_shared_setup__", None)
+        if shared_setup is not None:
+            class_name = shared_setup_names.setdefault(shared_setup, class_name)
+        groups.setdefault(class_name, []).append(test.id())
+    return groups
+
+
+def schedule(groups, durations):
+    """ Returns the names of ``groups`` (see ``group_tests_by_class``), the
+        slowest first. Classes which haven't run before are assumed to be as
+        slow as the slowest class. """
+    slowest = max(durations.values()) if durations else 0
+    return sorted(groups, key=lambda name: -durations.get(name, slowest))
+
+
+class RecordingResult(unittest.TestResult):
+    """ Records the events of a test run in a worker, so they can be sent to
+        the parent process and replayed by ``RemoteResult``. """
+
+    def __init__(self):
+        super(RecordingResult, self).__init__()
+        self.events = []
+
+    def record(self, event, test, detail=None):
+        self.events.append((event, test.id(), str(test), detail))
+
+    def startTest(self, test):
+        super(RecordingResult, self).startTest(test)
+        self.record("start", test)
+
+    def stopTest(self, test):
+        super(RecordingResult, self).stopTest(test)
+        self.record("stop", test)
+
+    def addSuccess(self, test):
+        super(RecordingResult, self).addSuccess(test)
+        self.record("success", test)
+
+    def addError(self, test, err):
+        super(RecordingResult, self).addError(test, err)
+        self.record("error", test, self.errors[-1][1])
+
+    def addFailure(self, test, err):
+        super(RecordingResult, self).addFailure(test, err)
+        self.record("failure", test, self.failures[-1][1])
+
+    def addSkip(self, test, reason):
+        super(RecordingResult, self).addSkip(test, reason)
+        self.record("skip", test, reason)
+
+    def addExpectedFailure(self, test, err):
+        super(RecordingResult, self).addExpectedFailure(test, err)
+        self.record("expected_failure", test, self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test):
+        super(RecordingResult, self).addUnexpectedSuccess(test)
+        self.record("unexpected_success", test)
+
+    def addSubTest(self, test, subtest, err):
+        super(RecordingResult, self).addSubTest(test, subtest, err)
+        if err is not None:
+            event = "failure" if issubclass(err[0], test.failureException) else "error"
+            errors = self.failures if event == "failure" else self.errors
+            self.record(event, subtest, errors[-1][1])
+
+
+class RemoteTest(object):
+    """ Stands in for a test which ran in a worker process. """
+
+    def __init__(self, test_id, description):
+        self.test_id = test_id
+        self.description = description
+
+    def id(self):
+        return self.test_id
+
+    def shortDescription(self):
+        return None
+
+    def __str__(self):
+        return self.description
+
+
+class RemoteResult(unittest.TextTestResult):
+    """ Reports the events recorded by each worker's ``RecordingResult``. The
+        tracebacks were formatted by the worker, so they're used as is. """
+
+    def _exc_info_to_string(self, err, test):
+        return err
+
+    def replay(self, events):
+        for event, test_id, description, detail in events:
+            test = RemoteTest(test_id, description)
+            if event == "start":
+                self.startTest(test)
+            elif event == "stop":
+                self.stopTest(test)
+            elif event == "success":
+                self.addSuccess(test)
+            elif event == "error":
+                self.addError(test, detail)
+            elif event == "failure":
+                self.addFailure(test, detail)
+            elif event == "skip":
+                self.addSkip(test, detail)
+            elif event == "expected_failure":
+                self.addExpectedFailure(test, detail)
+            elif event == "unexpected_success":
+                self.addUnexpectedSuccess(test)
+
+
+_worker_tests = None
+
+
+def init_worker(names, start_directory, pattern):
+    global _worker_tests
+    suite = load_tests(names, start_directory, pattern)
+    _worker_tests = dict((test.id(), test) for test in iter_tests(suite))
+    # A forked worker starts with the rows the main process has already
+    # added to its reporters.
+    for reporter in get_profile_reporters().values():
+        reporter.take_rows()
+    # Workers exit without running atexit handlers, but multiprocessing
+    # runs its finalizers.
+    multiprocessing.util.Finalize(None, shutdown, exitpriority=10)
+
+
+def get_profile_reporters():
+    return dict(
+        (hook.path, hook) for hook in get_row_hooks()
+        if isinstance(hook, RowProfileReporter)
+    )
+
+
+def run_class(test_ids, buffer=False):
+    """ Runs the tests ``test_ids`` (of a single class, or of the classes
+        which share a class setup) in a worker process, returning the events
+        recorded by a ``RecordingResult``, how long they took, and the rows
+        recorded by each ``RowProfileReporter`` (as ``{path: rows}``). """
+    result = RecordingResult()
+    result.buffer = buffer
+    suite = unittest.TestSuite(_worker_tests[test_id] for test_id in test_ids)
+    start = time.perf_counter()
+    suite.run(result)
+    duration = time.perf_counter() - start
+    get_result_cache().commit()
+    profile_rows = dict(
+        (path, reporter.take_rows())
+        for (path, reporter) in get_profile_reporters().items()
+    )
+    return result.events, duration, profile_rows
+
+
+def add_profile_rows(profile_rows):
+    """ Adds the rows recorded by the reporters of a worker to the reporters
+        of this process with the same paths (installing them if needed). """
+    reporters = get_profile_reporters()
+    for path, rows in profile_rows.items():
+        reporter = reporters.get(path)
+        if reporter is None:
+            reporter = reporters[path] = RowProfileReporter(path).install(trace_memory=False)
+        reporter.add_rows(rows)
+
+
+def load_durations(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(path, durations):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None, stream=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m parameterized.run",
+        description="Run unittest tests in a pool of processes.",
+    )
+    parser.add_argument(
+        "tests", nargs="*",
+        help="modules, classes or test methods to run (default: discover "
+        "tests in the start directory)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="number of worker processes (default: the number of CPUs)",
+    )
+    parser.add_argument(
+        "-s", "--start-directory", default=".",
+        help="directory to discover tests in (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-p", "--pattern", default="test*.py",
+        help="pattern of test files to discover (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--durations", default=None,
+        help="file the durations of each class are saved in (default: "
+        "durations.json in the cache directory)",
+    )
+    parser.add_argument(
+        "-b", "--buffer", action="store_true",
+        help="buffer the output of tests, showing it only when they fail",
+    )
+    parser.add_argument("-v", "--verbose", action="store_const", const=2, default=1, dest="verbosity")
+    parser.add_argument("-q", "--quiet", action="store_const", const=0, dest="verbosity")
+    args = parser.parse_args(argv)
+
+    durations_path = args.durations or os.path.join(get_cache_dir(), "durations.json")
+    durations = load_durations(durations_path)
+    groups = group_tests_by_class(load_tests(args.tests, args.start_directory, args.pattern))
+
+    stream = unittest.runner._WritelnDecorator(stream or sys.stderr)
+    result = RemoteResult(stream, True, args.verbosity)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=max(args.jobs, 1), initializer=init_worker,
+        initargs=(args.tests, args.start_directory, args.pattern),
+    ) as pool:
+        futures = dict(
+            (pool.submit(run_class, groups[name], args.buffer), name)
+            for name in schedule(groups, durations)
+        )
+        for future in as_completed(futures):
+            events, duration, profile_rows = future.result()
+            durations[futures[future]] = duration
+            result.replay(events)
+            add_profile_rows(profile_rows)
+    elapsed = time.perf_counter() - start
+    save_durations(durations_path, durations)
+
+    result.printErrors()
+    stream.writeln(result.separator2)
+    stream.writeln("Ran %d test%s in %.3fs" %(
+        result.testsRun, "" if result.testsRun == 1 else "s", elapsed,
+    ))
+    stream.writeln()
+    counts = [
+        ("failures", len(result.failures)),
+        ("errors", len(result.errors)),
+        ("skipped", len(result.skipped)),
+        ("expected failures", len(result.expectedFailures)),
+        ("unexpected successes", len(result.unexpectedSuccesses)),
+    ]
+    details = ", ".join("%s=%d" %(name, count) for (name, count) in counts if count)
+    status = "OK" if result.wasSuccessful() else "FAILED"
+    stream.writeln("%s (%s)" %(status, details) if details else status)
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,20 @@
 # coding=utf-8
 
-import inspect
+import gc
+import copy
+import os
 import sys
+import json
+import inspect
+import warnings
+import pickle
+import asyncio
+import weakref
+import unittest
+import threading
+import tempfile
+import shutil
+import subprocess
 import mock
 from functools import wraps
 from unittest import TestCase
@@ -15,7 +28,11 @@ except ImportError:
 
 from .parameterized import (
     PY3, PY2, parameterized, param, parameterized_argument_value_pairs,
-    short_repr, detect_runner, parameterized_class, SkipTest,
+    short_repr, detect_runner, parameterized_class, SkipTest, getargspec,
+    get_argument_layout, all_pairs, LazyValueCache, _lazy_value_cache,
+    set_shard, get_shard, param_fingerprint, stable_name_func,
+    set_result_cache, code_fingerprint, cached_input, clear_cache,
+    add_row_hook, remove_row_hook, RowProfileReporter,
 )
 
 
@@ -196,6 +213,19 @@ class TestParameterizedExpandWithMockPatchForClass(TestCase):
                               mock_fdopen._mock_name, mock_getpid._mock_name))
 
 
+    expect([
+        "test_lazy_patch_decorator('foo0', 'umask', 'getpid')",
+        "test_lazy_patch_decorator('foo1', 'umask', 'getpid')",
+    ])
+
+    @parameterized.expand(["foo0", "foo1"], lazy=True)
+    @mock.patch("os.umask")
+    def test_lazy_patch_decorator(self, foo, mock_umask, mock_getpid):
+        missing_tests.remove("test_lazy_patch_decorator(%r, %r, %r)" %
+                             (foo, mock_umask._mock_name,
+                              mock_getpid._mock_name))
+
+
 @mock.patch("os.getpid")
 class TestParameterizedExpandWithNoExpand(object):
     expect("generator", [
@@ -278,6 +308,37 @@ class TestParameterizedExpandWithNoMockPatchForClassNoExpand(object):
                              (foo, bar, mock_umask._mock_name))
 
 
+def test_expand_patches_each_test_case_when_it_runs():
+    namespace = {}
+    calls = []
+
+    @parameterized.expand([(1, ), (2, )], namespace=namespace)
+    @mock.patch("os.umask")
+    @mock.patch("os.getpid")
+    def test_patched(self, foo, mock_getpid, mock_umask):
+        calls.append((
+            foo, os.getpid is mock_getpid, os.umask is mock_umask,
+            os.getcwd() == "patched",
+        ))
+
+    test_0, test_1 = namespace["test_patched_0"], namespace["test_patched_1"]
+    assert test_0.patchings is not test_1.patchings
+    assert_equal(len(test_0.patchings), 2)
+
+    # Patches added to one test case (for example, by a class decorator)
+    # only apply to that test case.
+    test_0.patchings.append(mock.patch("os.getcwd", new=lambda: "patched"))
+    test_0(None)
+    test_1(None)
+    test_0(None)
+    assert_equal(calls, [
+        (1, True, True, True),
+        (2, True, True, False),
+        (1, True, True, True),
+    ])
+    assert os.getcwd() != "patched"
+
+
 expect("standalone", [
     "test_mock_patch_standalone_function(42, 'umask')",
 ])
@@ -367,6 +428,78 @@ class TestParamerizedOnTestCase(TestCase):
         missing_tests.remove("%s(%r, bar=%r)" %(expected_name, foo, bar))
 
 
+class TestParameterizedExpandLazy(TestCase):
+    expect([
+        "test_lazy(42, bar=None)",
+        "test_lazy(b'bar', bar=None)",
+        "test_lazy(123, bar=None)",
+        "test_lazy('foo0', bar=None)",
+        "test_lazy('foo1', bar=None)",
+        "test_lazy('foo2', bar=42)",
+    ])
+
+    @parameterized.expand(test_params, lazy=True)
+    def test_lazy(self, foo, bar=None):
+        missing_tests.remove("test_lazy(%r, bar=%r)" %(foo, bar))
+
+
+def test_expand_lazy_builds_tests_on_first_lookup():
+    class TestLazy(TestCase):
+        @parameterized.expand(["foo", "bar"], lazy=True)
+        def test_method(self, foo):
+            """ Documentation """
+
+    placeholder = TestLazy.__dict__["test_method_0_foo"]
+    assert_equal(placeholder.func, None)
+    # Test loaders look every test up on the class before selecting which to
+    # run, which doesn't build them.
+    assert TestLazy.test_method_0_foo is placeholder
+    loader = unittest.TestLoader()
+    loader.testNamePatterns = ["*_0_foo"]
+    suite = loader.loadTestsFromTestCase(TestLazy)
+    assert_equal(suite.countTestCases(), 1)
+    method = placeholder.func
+    assert_equal(method.__name__, "test_method_0_foo")
+    assert_equal(method.__doc__, "Documentation [with foo='foo']")
+    assert_equal(TestLazy("test_method_0_foo")._testMethodDoc, method.__doc__)
+    assert_equal(TestLazy.__dict__["test_method_1_bar"].func, None)
+
+
+def test_expand_docstrings_are_str_by_default():
+    namespace = {}
+
+    @parameterized.expand([(1, )], namespace=namespace)
+    def test_method(self, value):
+        """ Documentation. """
+
+    doc = namespace["test_method_0"].__doc__
+    assert_equal(type(doc), str)
+    assert_equal(inspect.getdoc(namespace["test_method_0"]), "Documentation. [with value=1]")
+
+
+def test_expand_docstrings_are_built_lazily():
+    reprs = []
+
+    class Value(object):
+        def __repr__(self):
+            reprs.append(self)
+            return "Value()"
+
+    namespace = {}
+
+    @parameterized.expand([(Value(), ), (Value(), )], namespace=namespace, lazy_doc=True)
+    def test_method(self, value):
+        """Documentation."""
+
+    assert_equal(reprs, [])
+    assert_equal(namespace["test_method_0"].__doc__, "Documentation [with value=Value()].")
+    assert_equal(len(reprs), 1)
+    assert_equal(str(namespace["test_method_0"].__doc__).rstrip("."), "Documentation [with value=Value()]")
+    assert_equal(len(reprs), 1)
+    assert_equal(namespace["test_method_1"].__doc__.split(" ")[0], "Documentation")
+    assert_equal(len(reprs), 2)
+
+
 class TestParameterizedExpandDocstring(TestCase):
     def _assert_docstring(self, expected_docstring, rstrip=False):
         """ Checks the current test method's docstring. Must be called directly
@@ -443,6 +576,24 @@ def test_warns_when_using_parameterized_with_TestCase():
         raise AssertionError("Expected exception not raised")
 
 
+@mock.patch("inspect.stack", side_effect=AssertionError("inspect.stack() called"))
+def test_decorating_does_not_inspect_the_stack(mock_stack):
+    class TestDecoratedWithoutInspectingTheStack(object):
+        @parameterized([(42, )])
+        def test_method(self, foo):
+            pass
+
+    try:
+        class TestDecoratedOnTestCase(TestCase):
+            @parameterized([(42, )])
+            def test_method(self, foo):
+                pass
+    except Exception as e:
+        assert_contains(str(e), "parameterized.expand")
+    else:
+        raise AssertionError("Expected exception not raised")
+
+
 def test_helpful_error_on_empty_iterable_input():
     try:
         parameterized([])(lambda: None)
@@ -475,6 +626,91 @@ expect("stadalone generator", [
 def test_wrapped_iterable_input(foo):
     missing_tests.remove("test_wrapped_iterable_input(%r)" %(foo, ))
 
+expect("standalone generator", [
+    "test_streamed_input('foo')",
+    "test_streamed_input('bar')",
+])
+@parameterized(lambda: (x for x in ["foo", "bar"]), stream=True)
+def test_streamed_input(foo):
+    missing_tests.remove("test_streamed_input(%r)" %(foo, ))
+
+
+def test_streamed_input_is_consumed_lazily():
+    consumed = []
+    def input():
+        for x in range(3):
+            consumed.append(x)
+            yield x
+
+    func = parameterized(input(), stream=True)(lambda x: None)
+    assert_equal(consumed, [])
+    cases = func()
+    next(cases)
+    assert_equal(consumed, [0])
+    assert_equal(len(list(cases)), 2)
+
+
+def test_streamed_iterator_can_only_be_consumed_once():
+    func = parameterized(iter(["foo"]), stream=True)(lambda x: None)
+    assert_equal(len(list(func())), 1)
+    try:
+        list(func())
+    except ValueError as e:
+        assert_contains(str(e), "already been consumed")
+    else:
+        raise AssertionError("Expected exception not raised")
+
+
+def test_streamed_empty_input():
+    func = parameterized(lambda: iter([]), stream=True)(lambda: None)
+    assert_raises(ValueError, list, func())
+    func = parameterized(lambda: iter([]), stream=True, skip_on_empty=True)(lambda: None)
+    assert_raises(SkipTest, list, func())
+
+
+concurrent_rows_barrier = threading.Barrier(3, timeout=10)
+
+expect("standalone generator", [
+    "test_concurrent_rows(0)",
+    "test_concurrent_rows(1)",
+    "test_concurrent_rows(2)",
+])
+@parameterized([(0, ), (1, ), (2, )], workers=3)
+def test_concurrent_rows(num):
+    # Will raise BrokenBarrierError unless all three rows run concurrently
+    concurrent_rows_barrier.wait()
+    missing_tests.remove("test_concurrent_rows(%r)" %(num, ))
+
+
+def test_concurrent_rows_are_reported_individually():
+    def check(outcome):
+        if outcome == "fail":
+            raise AssertionError("fail")
+        if outcome == "skip":
+            raise SkipTest("skip")
+
+    func = parameterized(["pass", "fail", "skip"], workers=2)(check)
+    outcomes = []
+    for case in func():
+        try:
+            case[0](*case[1:])
+            outcomes.append("pass")
+        except AssertionError:
+            outcomes.append("fail")
+        except SkipTest:
+            outcomes.append("skip")
+    assert_equal(outcomes, ["pass", "fail", "skip"])
+
+
+@parameterized([(os.getpid(), )], workers=2, executor="process")
+def test_rows_in_processes(parent_pid):
+    assert os.getpid() != parent_pid
+
+
+def test_helpful_error_on_invalid_executor():
+    assert_raises(TypeError, parameterized, [(1, )], workers=2, executor="fiber")
+
+
 def test_helpful_error_on_non_iterable_input():
     try:
         parameterized(lambda: 42)(lambda: None)
@@ -539,6 +775,1064 @@ def test_parameterized_argument_value_pairs(func_params, p, expected):
     assert_equal(actual, expected)
 
 
+def test_params_without_kwargs_share_empty_kwargs():
+    p0 = param(1)
+    p1 = param.from_decorator((2, ))
+    assert p0.kwargs is p1.kwargs
+    assert_equal(p0.kwargs, {})
+    assert_equal(repr(p0), "param(*(1,), **{})")
+    assert_raises(TypeError, p0.kwargs.update, {"foo": 1})
+    assert not hasattr(p0, "__dict__")
+
+
+def test_param_from_decorator_reuses_tuple():
+    args = (1, "foo")
+    assert param.from_decorator(args).args is args
+
+
+def test_param_pickle():
+    for p in [param(1, foo=2), param("foo")]:
+        actual = pickle.loads(pickle.dumps(p))
+        assert_equal(actual, p)
+        assert_equal(type(actual), param)
+    assert pickle.loads(pickle.dumps(param(1))).kwargs is param().kwargs
+
+
+def test_product():
+    assert_equal(list(parameterized.product([1, 2], b=["x", "y"])), [
+        param(1, b="x"),
+        param(1, b="y"),
+        param(2, b="x"),
+        param(2, b="y"),
+    ])
+    # Combinations are generated lazily
+    combos = parameterized.product(a=iter([1, 2]), b=iter([3, 4]))
+    assert_equal(next(combos), param(a=1, b=3))
+
+
+def test_pairwise_covers_every_pair():
+    columns = [list(range(4))] * 6
+    rows = list(all_pairs(columns))
+    expected_pairs = set(
+        (i, a, j, b)
+        for i in range(6) for j in range(i + 1, 6)
+        for a in range(4) for b in range(4)
+    )
+    actual_pairs = set(
+        (i, row[i], j, row[j])
+        for row in rows
+        for i in range(6) for j in range(i + 1, 6)
+    )
+    assert_equal(actual_pairs, expected_pairs)
+    assert len(rows) < 30, "%s rows (full product has %s)" %(len(rows), 4 ** 6)
+    assert_equal(rows, list(all_pairs(columns)))
+
+
+def test_pairwise_params():
+    assert_equal(list(parameterized.pairwise(a=[1, 2], b=["x", "y"], c=[True, False])), [
+        param(a=1, b="x", c=True),
+        param(a=1, b="y", c=False),
+        param(a=2, b="x", c=False),
+        param(a=2, b="y", c=True),
+    ])
+    assert_equal(list(parameterized.pairwise([1, 2])), [param(1), param(2)])
+    assert_equal(list(parameterized.pairwise([1, 2], [])), [])
+
+
+class TestParameterizedExpandBatchNameFunc(TestCase):
+    expect([
+        "test_custom_names_first_of_2(1)",
+        "test_custom_names_second_of_2(2)",
+    ])
+
+    @parameterized.expand([(1, ), (2, )], batch_name_func=lambda func, nums, params: [
+        "%s_%s_of_%s" %(func.__name__, name, len(params))
+        for name in ["first", "second"]
+    ])
+    def test_custom_names(self, foo):
+        missing_tests.remove("%s(%r)" %(self._testMethodName, foo))
+
+
+def test_batch_name_func_receives_every_row():
+    calls = []
+
+    def batch_name_func(func, nums, params):
+        calls.append((nums, params))
+        return ["test_%s" %(num, ) for num in nums]
+
+    namespace = {}
+    parameterized.expand(
+        list(range(11)), batch_name_func=batch_name_func, namespace=namespace,
+    )(func_for_batch_names)
+    assert_equal(calls, [(
+        ["00", "01", "02", "03", "04", "05", "06", "07", "08", "09", "10"],
+        [param(i) for i in range(11)],
+    )])
+    assert_equal(sorted(namespace), ["test_%02d" %(i, ) for i in range(11)])
+
+
+def test_helpful_errors_with_batch_name_func():
+    assert_raises(
+        TypeError, parameterized.expand,
+        [1], name_func=lambda *a: "x", batch_name_func=lambda *a: ["x"],
+    )
+    expand = parameterized.expand([1, 2], batch_name_func=lambda *a: ["x"], namespace={})
+    assert_raises(ValueError, expand, func_for_batch_names)
+
+
+def func_for_batch_names(foo):
+    pass
+
+
+def test_to_safe_name():
+    assert_equal(parameterized.to_safe_name("foo bar!baz"), "foo_bar_baz")
+    assert_equal(parameterized.to_safe_name(42), "42")
+    assert_equal(parameterized.to_safe_name("a b" * 1000), "a_b" * 1000)
+
+
+def test_param_fingerprint():
+    p = param("foo", {"b": {2, 1}, "a": b"x"}, c=[1.5, None])
+    assert_equal(
+        param_fingerprint(p),
+        param_fingerprint(param("foo", {"a": b"x", "b": {1, 2}}, c=[1.5, None])),
+    )
+    assert_equal(len(param_fingerprint(p)), 40)
+    for other in [param("foo"), param("foo", c=[1.5, None]), param(1), param(True), param([1])]:
+        assert param_fingerprint(other) != param_fingerprint(p), other
+    assert_equal(
+        param_fingerprint(param(1), serializer=lambda p: "custom"),
+        param_fingerprint(param(2), serializer=lambda p: b"custom"),
+    )
+
+
+def test_stable_names_do_not_depend_on_other_rows():
+    def names(rows):
+        namespace = {}
+        parameterized.expand(
+            rows, batch_name_func=stable_name_func(), namespace=namespace,
+        )(func_for_batch_names)
+        return set(namespace)
+
+    rows = [("foo", ), ("bar", ), (42, ), ("foo", )]
+    before = names(rows)
+    after = names([("new", )] + rows[::-1])
+    assert_equal(len(before), 4)
+    assert_equal(after - before, set([n for n in after if n.endswith("_new")]))
+    assert_equal(len(after - before), 1)
+    assert all(n.startswith("func_for_batch_names_") for n in before), before
+
+
+def test_skip_unchanged_rows():
+    calls = []
+    cache_dir = tempfile.mkdtemp()
+    cache_path = os.path.join(cache_dir, "results.sqlite")
+
+    def make_test_class(rows):
+        class TestUnchanged(TestCase):
+            @parameterized.expand(rows, skip_unchanged=True)
+            def test_method(self, value):
+                calls.append(value)
+                assert value != "fail"
+        return TestUnchanged
+
+    def run(rows):
+        del calls[:]
+        result = unittest.TestResult()
+        for test in unittest.TestLoader().loadTestsFromTestCase(make_test_class(rows)):
+            test.run(result)
+        return sorted(calls), len(result.skipped), len(result.failures)
+
+    set_result_cache(cache_path)
+    try:
+        assert_equal(run(["a", "b", "fail"]), (["a", "b", "fail"], 0, 1))
+        assert_equal(run(["a", "b", "fail"]), (["fail"], 2, 1))
+        assert_equal(run(["c", "b", "a", "fail"]), (["c", "fail"], 2, 1))
+        # Results are kept between runs
+        set_result_cache(cache_path)
+        assert_equal(run(["a", "c"]), ([], 2, 0))
+    finally:
+        set_result_cache(None)
+        shutil.rmtree(cache_dir)
+
+
+def test_skip_unchanged_rows_of_each_parameterized_class():
+    calls = []
+    cache_dir = tempfile.mkdtemp()
+    module = sys.modules[__name__]
+
+    def run():
+        del calls[:]
+        before = set(vars(module))
+
+        @parameterized_class(("v", ), [(1, ), (2, )])
+        class TestUnchangedVariant(TestCase):
+            @parameterized.expand([(1, ), (2, )], skip_unchanged=True)
+            def test_row(self, i):
+                calls.append((self.v, i))
+                assert self.v * 10 + i != 22
+
+        result = unittest.TestResult()
+        try:
+            for name in sorted(set(vars(module)) - before):
+                suite = unittest.TestLoader().loadTestsFromTestCase(getattr(module, name))
+                suite.run(result)
+        finally:
+            for name in set(vars(module)) - before:
+                delattr(module, name)
+        return sorted(calls), len(result.skipped), len(result.failures)
+
+    set_result_cache(os.path.join(cache_dir, "results.sqlite"))
+    try:
+        assert_equal(run(), ([(1, 1), (1, 2), (2, 1), (2, 2)], 0, 1))
+        assert_equal(run(), ([(2, 2)], 3, 1))
+    finally:
+        set_result_cache(None)
+        shutil.rmtree(cache_dir)
+
+
+def test_skip_unchanged_generator_rows():
+    calls = []
+    cache_dir = tempfile.mkdtemp()
+
+    @parameterized([(1, ), (2, )], skip_unchanged=True)
+    def check_value(value):
+        calls.append(value)
+
+    set_result_cache(os.path.join(cache_dir, "results.sqlite"))
+    try:
+        for _ in range(2):
+            for test in check_value():
+                try:
+                    test[0](*test[1:])
+                except SkipTest:
+                    calls.append("skipped")
+        assert_equal(calls, [1, 2, "skipped", "skipped"])
+    finally:
+        set_result_cache(None)
+        shutil.rmtree(cache_dir)
+
+
+def test_skip_unchanged_concurrent_rows_are_streamed():
+    cache_dir = tempfile.mkdtemp()
+    consumed = []
+
+    def input():
+        for x in range(200):
+            consumed.append(x)
+            yield (x, )
+
+    def check_value(value):
+        pass
+
+    set_result_cache(os.path.join(cache_dir, "results.sqlite"))
+    try:
+        func = parameterized(input, stream=True, workers=2, skip_unchanged=True)(check_value)
+        for test in func():
+            test[0](*test[1:])
+        del consumed[:]
+        cases = func()
+        assert_raises(SkipTest, lambda: next(cases)[0](0, {}))
+        assert len(consumed) <= 6, len(consumed)
+        cases.close()
+    finally:
+        set_result_cache(None)
+        shutil.rmtree(cache_dir)
+
+
+def test_code_fingerprint():
+    def make_func(value):
+        def func():
+            return [x for x in range(value)]
+        return func
+
+    def other_func():
+        return [x for x in range(2)]
+
+    assert_equal(code_fingerprint(make_func(1)), code_fingerprint(make_func(2)))
+    assert code_fingerprint(make_func(1)) != code_fingerprint(other_func)
+    assert_equal(code_fingerprint(wraps(other_func)(lambda: None)), code_fingerprint(other_func))
+
+
+def test_expand_generates_only_the_rows_owned_by_the_shard():
+    def expand(shard):
+        namespace = {}
+        set_shard(*shard)
+        try:
+            parameterized.expand(
+                [("row %s" %(i, ), ) for i in range(30)], namespace=namespace,
+            )(func_for_batch_names)
+        finally:
+            set_shard(None)
+        return set(namespace)
+
+    all_names = expand((1, 1))
+    shard_names = [expand((i, 3)) for i in range(1, 4)]
+    assert_equal(set.union(*shard_names), all_names)
+    assert_equal(sum(len(names) for names in shard_names), len(all_names))
+    assert all(shard_names), shard_names
+    assert_equal(expand((2, 3)), shard_names[1])
+
+
+class ShardedBase(object):
+    def test_method(self):
+        pass
+
+
+def test_parameterized_class_generates_only_the_classes_owned_by_the_shard():
+    module = sys.modules[__name__]
+    input_dicts = [{"name": "shard_%s" %(i, )} for i in range(10)]
+    names = []
+    for index in [1, 2]:
+        set_shard(index, 2)
+        try:
+            before = set(vars(module))
+            parameterized_class(input_dicts)(type("ShardedBase", (ShardedBase, ), {}))
+            names.append(set(vars(module)) - before)
+        finally:
+            set_shard(None)
+            for name in set(vars(module)) - before:
+                delattr(module, name)
+    assert_equal(len(names[0]) + len(names[1]), 10)
+    assert not (names[0] & names[1])
+
+
+def test_expanded_parameterized_class_is_sharded_by_test_ids():
+    module = sys.modules[__name__]
+
+    def load(shard):
+        before = set(vars(module))
+        set_shard(*shard)
+        try:
+            @parameterized_class(("v", ), [(v, ) for v in range(6)])
+            class TestShardedVariant(TestCase):
+                @parameterized.expand([(i, ) for i in range(10)])
+                def test_row(self, i):
+                    pass
+
+            loader = unittest.TestLoader()
+            return [
+                test.id()
+                for name in sorted(set(vars(module)) - before)
+                for test in loader.loadTestsFromTestCase(getattr(module, name))
+            ]
+        finally:
+            set_shard(None)
+            for name in set(vars(module)) - before:
+                delattr(module, name)
+
+    all_ids = load((1, 1))
+    shard_ids = [load((i, 3)) for i in range(1, 4)]
+    assert_equal(len(all_ids), 60)
+    assert_equal(sorted(sum(shard_ids, [])), sorted(all_ids))
+    assert all(shard_ids), shard_ids
+
+
+def test_shard_from_environment():
+    with mock.patch.dict(os.environ, {"PARAMETERIZED_SHARD": "3/30"}):
+        assert_equal(get_shard(), (3, 30))
+        set_shard(1, 2)
+        try:
+            assert_equal(get_shard(), (1, 2))
+        finally:
+            set_shard(None)
+    for value in ["3", "a/b", "0/30", "31/30"]:
+        with mock.patch.dict(os.environ, {"PARAMETERIZED_SHARD": value}):
+            assert_raises(ValueError, get_shard)
+
+
+class TestTableSources(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def source(self, source):
+        self.addCleanup(source.close)
+        return source
+
+    def write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_csv(self):
+        path = self.write("cases.csv", (
+            b'input,expected\r\n'
+            b'1,"multi\r\n\r\nline"\r\n'
+            b'\r\n'
+            b'2,"quoted ""value"""\r\n'
+            b'3,last'
+        ))
+        source = self.source(parameterized.from_csv(path, converters={"input": int}))
+        assert_equal(len(source), 3)
+        assert_equal([dict(p.kwargs) for p in source], [
+            {"input": 1, "expected": "multi\r\n\r\nline"},
+            {"input": 2, "expected": 'quoted "value"'},
+            {"input": 3, "expected": "last"},
+        ])
+
+    def test_columns(self):
+        path = self.write("cases.csv", b"a;b;c\n1;2;3\n")
+        source = self.source(parameterized.from_csv(
+            path, columns={"c": "x", "a": "y"}, delimiter=";",
+        ))
+        assert_equal([dict(p.kwargs) for p in source], [{"x": "3", "y": "1"}])
+        source = self.source(parameterized.from_csv(path, columns=["missing"], delimiter=";"))
+        self.assertRaises(KeyError, dict, next(iter(source)).kwargs)
+        source = self.source(parameterized.from_csv(path, fieldnames=["x", "y", "z"], delimiter=";"))
+        assert_equal(len(source), 2)
+
+    def test_jsonl(self):
+        path = self.write("cases.jsonl", b'{"a": 1, "b": [1, 2]}\n\n{"a": 2, "b": null}\n[3]\n')
+        params = list(self.source(parameterized.from_jsonl(path, columns=["b"])))
+        assert_equal([dict(p.kwargs) for p in params[:2]], [{"b": [1, 2]}, {"b": None}])
+        self.assertRaises(ValueError, dict, params[2].kwargs)
+
+    def test_empty_file(self):
+        source = self.source(parameterized.from_csv(self.write("empty.csv", b"")))
+        assert_equal(list(source), [])
+
+    def test_rows_are_decoded_when_the_test_runs(self):
+        path = self.write("cases.jsonl", b'{"input": 1, "expected": 2}\n{"input": 41, "expected": 42}\n')
+        source = self.source(parameterized.from_jsonl(path))
+        calls = []
+        namespace = {}
+
+        @parameterized.expand(source, namespace=namespace)
+        def test_add1(self, input, expected):
+            calls.append((input, expected))
+
+        assert_equal(sorted(namespace), ["test_add1_0", "test_add1_1"])
+        assert_equal(source.last_row, (None, None))
+        namespace["test_add1_1"](None)
+        assert_equal(calls, [(41, 42)])
+        assert_equal(source.last_row, (1, {"input": 41, "expected": 42}))
+
+    def test_rows_of_documented_tests_are_decoded_when_the_test_runs(self):
+        path = self.write("cases.jsonl", b"".join(
+            b'{"input": %d, "expected": %d}\n' %(i, i + 1) for i in range(100)
+        ))
+        source = self.source(parameterized.from_jsonl(path))
+        decoded = []
+        decode_row = source.decode_row
+        source.decode_row = lambda data: decoded.append(data) or decode_row(data)
+        namespace = {}
+
+        @parameterized.expand(source, namespace=namespace)
+        def test_add1(self, input, expected):
+            """ Adds one. """
+
+        assert_equal(len(namespace), 100)
+        assert_equal(decoded, [])
+        doc = namespace["test_add1_42"].__doc__
+        assert_equal(decoded, [])
+        assert_contains(str(doc), "'input': 42")
+        assert_equal(len(decoded), 1)
+
+
+class TestVectorizedBatches(TestCase):
+    def expand(self, input, func, **kwargs):
+        namespace = {}
+        parameterized.expand(input, namespace=namespace, **kwargs)(func)
+        outcomes = []
+        for name in sorted(namespace):
+            try:
+                namespace[name](self)
+                outcomes.append("ok")
+            except Exception as e:
+                outcomes.append("%s: %s" %(type(e).__name__, e))
+        return outcomes
+
+    def test_rows_are_run_in_batches(self):
+        calls = []
+
+        def test_add(self, a, b, expected=None):
+            calls.append((a, b, expected))
+            return [x + y == z for (x, y, z) in zip(a, b, expected)]
+
+        outcomes = self.expand([
+            param(1, 2, expected=3),
+            param(2, 2, expected=5),
+            param(3, 4, expected=8),
+        ], test_add, batch=2, batch_stack=tuple)
+        assert_equal(calls, [((1, 2), (2, 2), (3, 5)), ((3, ), (4, ), (8, ))])
+        assert_equal(outcomes, [
+            "ok",
+            "AssertionError: Row 1 (row 1 of its batch) failed (its outcome was False)",
+            "AssertionError: Row 2 (row 0 of its batch) failed (its outcome was False)",
+        ])
+
+    def test_outcomes(self):
+        def test_outcomes(self, outcome):
+            return outcome
+
+        outcomes = self.expand(
+            [None, True, KeyError("missing"), 0],
+            test_outcomes, batch=4,
+        )
+        assert_equal(outcomes, [
+            "ok", "ok", "KeyError: 'missing'",
+            "AssertionError: Row 3 (row 3 of its batch) failed (its outcome was 0)",
+        ])
+
+    def test_errors_are_raised_by_every_row_of_the_batch(self):
+        def test_raises(self, value):
+            if 3 in value:
+                raise ValueError("bad batch")
+
+        outcomes = self.expand([1, 2, 3], test_raises, batch=2)
+        assert_equal(outcomes, ["ok", "ok", "ValueError: bad batch"])
+
+        outcomes = self.expand([1, 2, 3], lambda self, value: [True], batch=2)
+        assert_equal(outcomes[0], outcomes[1])
+        assert_contains(outcomes[0], "returned 1 outcomes for 2 rows")
+        assert_equal(outcomes[2], "ok")
+
+        outcomes = self.expand([(1, ), (1, 2)], lambda self, *args: None, batch=2)
+        assert_contains(outcomes[0], "Every row in a batch must have the same arguments")
+
+    def test_invalid_options(self):
+        self.assertRaises(ValueError, parameterized.expand, [1], batch=0)
+        self.assertRaises(TypeError, parameterized.expand, [1], batch=2, skip_unchanged=True)
+
+        async def test_async(self, value):
+            pass
+
+        self.assertRaises(TypeError, parameterized.expand([1], batch=2, namespace={}), test_async)
+
+
+class TestBatchedDecorator(TestCase):
+    expect([
+        "test_batched([1, 2])",
+        "test_batched([3])",
+    ])
+
+    @parameterized.batched([(1, ), (2, ), (3, )], size=2)
+    def test_batched(self, values):
+        missing_tests.remove("test_batched(%r)" %(values, ))
+        return [value < 4 for value in values]
+
+
+class TestMaxConsecutiveFailures(TestCase):
+    def run_rows(self, input, func, **kwargs):
+        namespace = {}
+        parameterized.expand(input, namespace=namespace, **kwargs)(func)
+        outcomes = []
+        for name in sorted(namespace):
+            try:
+                namespace[name](self)
+                outcomes.append("ok")
+            except SkipTest as e:
+                outcomes.append("skip: %s" %(e, ))
+            except Exception as e:
+                outcomes.append(type(e).__name__)
+        return outcomes
+
+    def test_remaining_rows_are_skipped(self):
+        calls = []
+
+        def test_connect(self, value):
+            calls.append(value)
+            raise ConnectionError("refused %s" %(value, ))
+
+        outcomes = self.run_rows(range(5), test_connect, max_consecutive_failures=3)
+        skip = (
+            "skip: skipped after 3 consecutive rows failed with "
+            "ConnectionError (last: 'refused 2')"
+        )
+        assert_equal(calls, [0, 1, 2])
+        assert_equal(outcomes, ["ConnectionError"] * 3 + [skip] * 2)
+
+    def test_passing_rows_and_other_exceptions_reset_the_count(self):
+        def test_value(self, value):
+            if value == "skip":
+                raise SkipTest("skipped")
+            if value is not None:
+                raise value
+
+        outcomes = self.run_rows([
+            KeyError(), KeyError(), (None, ), KeyError(), KeyError(), ValueError(),
+            KeyError(), "skip", KeyError(), KeyError(), (None, ),
+        ], test_value, max_consecutive_failures=3)
+        assert_equal(outcomes, [
+            "KeyError", "KeyError", "ok", "KeyError", "KeyError", "ValueError",
+            "KeyError", "skip: skipped", "KeyError", "KeyError",
+            "skip: skipped after 3 consecutive rows failed with KeyError (last: '')",
+        ])
+
+    def test_generator(self):
+        @parameterized([1, 2, 3], max_consecutive_failures=1)
+        def func_for_max_failures(value):
+            assert_equal(value, 0)
+
+        outcomes = []
+        for nose_tuple in func_for_max_failures():
+            try:
+                nose_tuple[0](*nose_tuple[1:])
+            except SkipTest:
+                outcomes.append("skip")
+            except AssertionError:
+                outcomes.append("fail")
+        assert_equal(outcomes, ["fail", "skip", "skip"])
+
+    def test_concurrent_rows_are_streamed_once_open(self):
+        consumed = []
+
+        def input():
+            for x in range(200):
+                consumed.append(x)
+                yield (x, )
+
+        def func_for_max_failures(value):
+            raise ConnectionError("refused")
+
+        func = parameterized(
+            input, stream=True, workers=2, max_consecutive_failures=1,
+        )(func_for_max_failures)
+        cases = func()
+        self.assertRaises(ConnectionError, lambda: next(cases)[0](0, {}))
+        del consumed[:]
+        for _ in range(10):
+            self.assertRaises(SkipTest, lambda: next(cases)[0](0, {}))
+        self.assertLessEqual(len(consumed), 16)
+        cases.close()
+
+    def test_invalid_options(self):
+        self.assertRaises(ValueError, parameterized.expand, [1], max_consecutive_failures=0)
+        self.assertRaises(ValueError, parameterized, [1], max_consecutive_failures=0)
+        self.assertRaises(
+            TypeError, parameterized.expand, [1], batch=2, max_consecutive_failures=1,
+        )
+
+
+class TestCachedInput(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        patcher = mock.patch.dict(os.environ, {
+            "PARAMETERIZED_CACHE_DIR": os.path.join(self.tmpdir, "cache"),
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def make_input(self, key="v1", paths=(), **kwargs):
+        @cached_input(key, paths=paths, **kwargs)
+        def load():
+            self.calls.append(key)
+            return [(1, 2), param(3, expected=4)]
+        return load
+
+    def table_names(self):
+        return sorted(os.listdir(os.path.join(self.tmpdir, "cache", "tables")))
+
+    def test_tables_are_loaded_from_the_cache(self):
+        load = self.make_input()
+        assert_equal(load(), [param(1, 2), param(3, expected=4)])
+        assert_equal(load(), [param(1, 2), param(3, expected=4)])
+        assert_equal(self.calls, ["v1"])
+        self.make_input("v2")()
+        assert_equal(self.calls, ["v1", "v2"])
+        assert_equal(len(self.table_names()), 2)
+
+    def test_changed_paths_invalidate_the_cache(self):
+        fixture = os.path.join(self.tmpdir, "fixtures", "a.txt")
+        os.makedirs(os.path.dirname(fixture))
+        with open(fixture, "w") as f:
+            f.write("a")
+        load = self.make_input(paths=[os.path.dirname(fixture)])
+        load()
+        load()
+        with open(fixture, "w") as f:
+            f.write("changed")
+        load()
+        assert_equal(self.calls, ["v1", "v1"])
+
+    def test_corrupt_and_unpicklable_tables(self):
+        load = self.make_input()
+        load()
+        [name] = self.table_names()
+        with open(os.path.join(self.tmpdir, "cache", "tables", name), "wb") as f:
+            f.write(b"corrupt")
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert_equal(load(), [param(1, 2), param(3, expected=4)])
+        assert_contains(str(caught[0].message), "invalid cached input")
+        assert_equal(self.calls, ["v1", "v1"])
+
+        unpicklable = cached_input("v1")(lambda: [(lambda: None, )])
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            assert_equal(len(unpicklable()), 1)
+        assert_contains(str(caught[0].message), "can't be pickled")
+
+    def test_least_recently_used_tables_are_evicted(self):
+        for key in ["a", "b", "c"]:
+            self.make_input(key, max_size=1)()
+        assert_equal(len(self.table_names()), 1)
+
+    def test_expand_and_clear_cache(self):
+        load = self.make_input()
+        namespace = {}
+
+        @parameterized.expand(load, namespace=namespace)
+        def test_add(self, input, expected):
+            pass
+
+        assert_equal(sorted(namespace), ["test_add_0", "test_add_1"])
+        from .__main__ import main
+        with mock.patch("sys.stdout"):
+            assert_equal(main(["clear-cache"]), 0)
+        assert not os.path.exists(os.path.join(self.tmpdir, "cache"))
+        assert not clear_cache()
+
+
+class TestRowHooks(TestCase):
+    def setUp(self):
+        self.calls = []
+        add_row_hook(self.hook)
+        self.addCleanup(remove_row_hook, self.hook)
+
+    def hook(self, func, index, p, duration, peak_memory, outcome):
+        assert duration >= 0
+        self.calls.append((func.__name__, index, p, outcome))
+
+    def test_expand(self):
+        namespace = {}
+
+        @parameterized.expand([(1, ), (2, ), (3, )], namespace=namespace)
+        def test_value(self, value):
+            if value == 2:
+                raise SkipTest("skipped")
+            assert_equal(value, 1)
+
+        for name in sorted(namespace):
+            try:
+                namespace[name](None)
+            except (SkipTest, AssertionError):
+                pass
+        assert_equal(self.calls, [
+            ("test_value", 0, param(1), "passed"),
+            ("test_value", 1, param(2), "skipped"),
+            ("test_value", 2, param(3), "failed"),
+        ])
+
+    def run_namespace(self, namespace):
+        for name in sorted(namespace):
+            try:
+                namespace[name](None)
+            except AssertionError:
+                pass
+
+    def test_batch(self):
+        namespace = {}
+
+        @parameterized.expand([1, 2, 3], namespace=namespace, batch=2)
+        def test_value(self, values):
+            return [value != 2 for value in values]
+
+        self.run_namespace(namespace)
+        assert_equal(self.calls, [
+            ("test_value", 0, param(1), "passed"),
+            ("test_value", 1, param(2), "failed"),
+            ("test_value", 2, param(3), "passed"),
+        ])
+
+    def test_async_concurrency(self):
+        namespace = {}
+
+        @parameterized.expand([1, 2], namespace=namespace, async_concurrency=2)
+        async def test_value(self, value):
+            assert_equal(value, 1)
+
+        self.run_namespace(namespace)
+        assert_equal(sorted(self.calls, key=lambda call: call[1]), [
+            ("test_value", 0, param(1), "passed"),
+            ("test_value", 1, param(2), "failed"),
+        ])
+
+    def test_nose_generator(self):
+        @parameterized([(1, ), param(2, extra="x")])
+        def func_for_row_hooks(value, extra=None):
+            if extra:
+                raise KeyError(extra)
+
+        for nose_tuple in func_for_row_hooks():
+            try:
+                nose_tuple[0](*nose_tuple[1:])
+            except KeyError:
+                pass
+        assert_equal(self.calls, [
+            ("_parameterized_original_func_for_row_hooks", 0, param(1), "passed"),
+            ("_parameterized_original_func_for_row_hooks", 1, param(2, extra="x"), "error"),
+        ])
+
+
+def test_row_profile_reporter():
+    def func():
+        pass
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for name in ["profile.json", "profile.csv"]:
+            reporter = RowProfileReporter(os.path.join(tmpdir, name), top=2)
+            for index, duration, peak_memory in [(0, 0.5, 10), (1, 2.0, None), (2, 1.0, 30)]:
+                reporter(func, index, param(index), duration, peak_memory, "passed")
+            reporter.write()
+
+        with open(os.path.join(tmpdir, "profile.json")) as f:
+            [(test_name, rankings)] = json.load(f).items()
+        assert test_name.endswith("test_row_profile_reporter.<locals>.func")
+        assert_equal([row["index"] for row in rankings["slowest"]], [1, 2])
+        assert_equal([row["index"] for row in rankings["most_memory"]], [2, 0])
+
+        with open(os.path.join(tmpdir, "profile.csv")) as f:
+            lines = f.read().splitlines()
+        assert_equal(lines[0], "test,ranking,rank,index,param,duration,peak_memory,outcome")
+        assert_equal(
+            [line.split(",")[1:4] for line in lines[1:]],
+            [["slowest", "1", "1"], ["slowest", "2", "2"],
+             ["most_memory", "1", "2"], ["most_memory", "2", "0"]],
+        )
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_lazy_values_are_shared_and_released():
+    built = []
+
+    def load(name):
+        built.append(name)
+        return name.upper()
+
+    class TestLazyValues(TestCase):
+        @parameterized.expand([
+            (param.lazy(load, "a"), "A"),
+            (param.lazy(load, "a"), "A"),
+            (param.lazy(load, name="b"), "B"),
+        ])
+        def test_value(self, value, expected):
+            assert_equal(value, expected)
+
+    assert_equal(built, [])
+    result = unittest.TestResult()
+    # Tests are run one by one, as running a suite would run this module's
+    # tearDownModule.
+    for test in unittest.TestLoader().loadTestsFromTestCase(TestLazyValues):
+        test.run(result)
+    assert_equal((result.testsRun, result.errors, result.failures), (3, [], []))
+    assert_equal(built, ["a", "b"])
+    assert param.lazy(load, "a").key not in _lazy_value_cache.values
+    assert param.lazy(load, "a").key not in _lazy_value_cache.refcounts
+
+
+def test_lazy_value_cache_evicts_least_recently_used():
+    built = []
+    cache = LazyValueCache(max_size=2)
+    a, b, c = [param.lazy(built.append, x) for x in "abc"]
+    for value in [a, b, a, c, a, b]:
+        cache.get(value)
+    assert_equal(built, ["a", "b", "c", "b"])
+    cache.set_max_size(0)
+    assert_equal(len(cache.values), 0)
+
+
+def test_lazy_value_repr():
+    assert_equal(param.lazy(int, "10", base=16), param.lazy(int, "10", base=16))
+    assert_equal(repr(param.lazy(int, "10", base=16)), "param.lazy(int, '10', base=16)")
+    assert param.lazy(list, [1]) != param.lazy(list, [1])
+
+
+@parameterized([
+    (param.lazy(str.upper, "foo"), "FOO"),
+    param(param.lazy(str.upper, "bar"), expected="BAR"),
+])
+def test_lazy_value_in_generator(value, expected):
+    assert_equal(value, expected)
+
+
+def test_benchmark_writes_json_results():
+    from . import benchmark
+    output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+    output.close()
+    try:
+        benchmark.main([
+            "--sizes", "2",
+            "--repeat", "1",
+            "--benchmarks", "param_memory,decorate_expand,collect_unittest",
+            "--output", output.name,
+        ])
+        with open(output.name) as f:
+            results = json.load(f)
+    finally:
+        os.unlink(output.name)
+    assert_equal(
+        [(r["benchmark"], r["size"]) for r in results["results"]],
+        [("param_memory", 2), ("decorate_expand", 2), ("collect_unittest", 2)],
+    )
+
+
+def run_parameterized_run(tmpdir, lines, args=(), env=None):
+    """ Writes ``lines`` to ``test_run_smoke.py`` in ``tmpdir``, and runs
+        ``python -m parameterized.run`` there, returning its exit code and
+        output. """
+    with open(os.path.join(tmpdir, "test_run_smoke.py"), "w") as f:
+        f.write("\n".join(lines))
+    env = dict(
+        os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(__file__)),
+        PARAMETERIZED_CACHE_DIR=os.path.join(tmpdir, "cache"), **(env or {})
+    )
+    proc = subprocess.run(
+        [sys.executable, "-m", "parameterized.run"] + list(args),
+        cwd=tmpdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    return proc.returncode, proc.stdout.decode("utf-8")
+
+
+def test_run_distributes_classes_to_workers():
+    tmpdir = tempfile.mkdtemp()
+    try:
+        durations_path = os.path.join(tmpdir, "durations.json")
+        returncode, output = run_parameterized_run(tmpdir, [
+            "import os, unittest",
+            "from parameterized import parameterized_class",
+            "@parameterized_class(('n', ), [(1, ), (2, )])",
+            "class TestVariant(unittest.TestCase):",
+            "    def test_pid(self):",
+            "        self.assertEqual(self.n, self.n)",
+            "class TestFailure(unittest.TestCase):",
+            "    def test_fail(self):",
+            "        self.assertEqual(1, 2)",
+        ], ["-j", "2", "--durations", durations_path])
+        assert_equal(returncode, 1, output)
+        assert_contains(output, "Ran 3 tests")
+        assert_contains(output, "FAIL: test_fail (test_run_smoke.TestFailure")
+        assert_contains(output, "FAILED (failures=1)")
+        with open(durations_path) as f:
+            assert_equal(sorted(json.load(f)), [
+                "test_run_smoke.TestFailure",
+                "test_run_smoke.TestVariant_0",
+                "test_run_smoke.TestVariant_1",
+            ])
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_run_saves_skip_unchanged_results_from_workers():
+    tmpdir = tempfile.mkdtemp()
+    lines = [
+        "import unittest",
+        "from parameterized import parameterized",
+        "class TestUnchanged(unittest.TestCase):",
+        "    @parameterized.expand([(i, ) for i in range(5)], skip_unchanged=True)",
+        "    def test_row(self, i):",
+        "        pass",
+    ]
+    try:
+        returncode, output = run_parameterized_run(tmpdir, lines, ["-j", "2"])
+        assert_equal(returncode, 0, output)
+        assert_contains(output, "Ran 5 tests")
+        assert "skipped" not in output, output
+        returncode, output = run_parameterized_run(tmpdir, lines, ["-j", "2"])
+        assert_equal(returncode, 0, output)
+        assert_contains(output, "OK (skipped=5)")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_run_keeps_classes_with_a_shared_setup_in_one_worker():
+    tmpdir = tempfile.mkdtemp()
+    log_path = os.path.join(tmpdir, "log.txt")
+    try:
+        returncode, output = run_parameterized_run(tmpdir, [
+            "import unittest",
+            "from parameterized import parameterized_class",
+            "def log(event):",
+            "    with open(%r, 'a') as f:" %(log_path, ),
+            "        f.write(event + '\\n')",
+            "@parameterized_class(('group', 'n'), [('a', n) for n in range(4)],",
+            "                     shared_setup_attrs=('group', ))",
+            "class TestShared(unittest.TestCase):",
+            "    @classmethod",
+            "    def setUpSharedClass(cls):",
+            "        log('setup')",
+            "    @classmethod",
+            "    def tearDownSharedClass(cls):",
+            "        log('teardown')",
+            "    def test_n(self):",
+            "        pass",
+        ], ["-j", "2"])
+        assert_equal(returncode, 0, output)
+        assert_contains(output, "Ran 4 tests")
+        with open(log_path) as f:
+            assert_equal(f.read().split(), ["setup", "teardown"])
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_run_reports_rows_profiled_by_workers():
+    tmpdir = tempfile.mkdtemp()
+    profile_path = os.path.join(tmpdir, "profile.json")
+    try:
+        returncode, output = run_parameterized_run(tmpdir, [
+            "import unittest",
+            "from parameterized import parameterized, parameterized_class",
+            "@parameterized_class(('n', ), [(1, ), (2, )])",
+            "class TestProfiled(unittest.TestCase):",
+            "    @parameterized.expand([(i, ) for i in range(3)])",
+            "    def test_row(self, i):",
+            "        pass",
+        ], ["-j", "2"], env={"PARAMETERIZED_PROFILE": profile_path})
+        assert_equal(returncode, 0, output)
+        with open(profile_path) as f:
+            report = json.load(f)
+        assert_equal(list(report), ["test_run_smoke.TestProfiled.test_row"])
+        rows = report["test_run_smoke.TestProfiled.test_row"]["slowest"]
+        assert_equal(sorted(row["index"] for row in rows), [0, 0, 1, 1, 2, 2])
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_run_schedules_the_slowest_classes_first():
+    from .run import schedule
+    groups = {"a": [], "b": [], "c": []}
+    assert_equal(schedule(groups, {"a": 1.0, "b": 3.0}), ["b", "c", "a"])
+
+
+def test_empty_kwargs_are_shared_and_immutable():
+    p = param(1)
+    assert p.kwargs is param(2).kwargs
+    try:
+        p.kwargs["foo"] = 1
+    except TypeError as e:
+        assert_contains(str(e), "dict(p.kwargs)")
+    else:
+        raise AssertionError("expected TypeError")
+    for kwargs in [copy.copy(p.kwargs), copy.deepcopy(p.kwargs), dict(p.kwargs)]:
+        assert_equal(type(kwargs), dict)
+        kwargs["foo"] = 1
+    assert_equal(p.kwargs, {})
+
+
+def test_argspec_is_cached_per_function():
+    def func(self, foo, bar=42):
+        pass
+
+    assert getargspec(func) is getargspec(func)
+    layout = get_argument_layout(func)
+    assert get_argument_layout(func) is layout
+    assert_equal(layout.named_args, ("foo", "bar"))
+
+    func_ref = weakref.ref(func)
+    del func
+    gc.collect()
+    assert_equal(func_ref(), None)
+
+
 @parameterized([
     ("abcd", "'abcd'"),
     ("123456789", "'12...89'"),
@@ -548,6 +1842,42 @@ def test_parameterized_argument_value_pairs(func_params, p, expected):
 def test_short_repr(input, expected, n=6):
     assert_equal(short_repr(input, n=n), expected)
 
+
+recursive_list = [1]
+recursive_list.append(recursive_list)
+
+@parameterized([
+    ("x'y" * 10, ),
+    ("x'\"y" * 10, ),
+    (b"\x00'" * 10, ),
+    (bytearray(b"\"'") * 10, ),
+    (list(range(20)), ),
+    (tuple("abcdefgh"), ),
+    (("a" * 30, ), ),
+    ({"a" * 10: [1] * 10, "b": {"c": "d" * 20}}, ),
+    (set(range(20)), ),
+    (frozenset(range(20)), ),
+    (recursive_list * 5, ),
+    ([None] * 5, ),
+])
+def test_short_repr_matches_repr(input):
+    for n in range(0, 40):
+        full = repr(input)
+        expected = full if len(full) <= n else full[:n//2] + "..." + full[len(full) - n//2:]
+        assert_equal(short_repr(input, n=n), expected)
+
+
+def test_short_repr_only_formats_what_is_shown():
+    reprs = []
+
+    class Value(object):
+        def __repr__(self):
+            reprs.append(self)
+            return "Value()"
+
+    assert_equal(short_repr([Value()] * 100000, n=20), "[Value(), ..., Value()]")
+    assert len(reprs) < 10, "%s values formatted" %(len(reprs), )
+
 @parameterized([
     ("foo", ),
 ])
@@ -615,6 +1945,152 @@ class TestNamedParameterizedClass(TestCase):
         ))
 
 
+@parameterized_class(("a", ), [(1, ), (2, )], lazy=True)
+class TestLazyParameterizedClass(TestCase):
+    expect([
+        "TestLazyParameterizedClass_0:test_method(1)",
+        "TestLazyParameterizedClass_1:test_method(2)",
+    ])
+
+    def test_method(self):
+        missing_tests.remove("%s:test_method(%r)" %(
+            self.__class__.__name__,
+            self.a,
+        ))
+
+
+def test_lazy_parameterized_class_is_created_when_looked_up():
+    module = type(sys)("parameterized_lazy_class_module")
+
+    def module_getattr(name):
+        if name == "fallback":
+            return "fallback value"
+        raise AttributeError(name)
+
+    module.__getattr__ = module_getattr
+    sys.modules[module.__name__] = module
+    try:
+        class Base(TestCase):
+            __module__ = module.__name__
+
+            def test_method(self):
+                pass
+
+        parameterized_class(("a", ), [(1, ), (2, )], lazy=True)(Base)
+        assert_equal(
+            [name for name in dir(module) if name.startswith("Base")],
+            ["Base_0", "Base_1"],
+        )
+        assert "Base_0" not in vars(module)
+        cls = module.Base_0
+        assert_equal((cls.__name__, cls.a, cls.__mro__[1]), ("Base_0", 1, Base))
+        assert module.Base_0 is vars(module)["Base_0"]
+        assert_equal(module.fallback, "fallback value")
+        assert not hasattr(module, "Base_2")
+        suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+        assert_equal(suite.countTestCases(), 2)
+    finally:
+        del sys.modules[module.__name__]
+
+
+class TestSharedClassSetup(TestCase):
+    def setUp(self):
+        self.module = type(sys)("parameterized_shared_setup_module")
+        sys.modules[self.module.__name__] = self.module
+        self.addCleanup(sys.modules.pop, self.module.__name__)
+        self.log = []
+
+    def run_classes(self, fail=False):
+        log = self.log
+
+        class Base(TestCase):
+            __module__ = self.module.__name__
+
+            @classmethod
+            def setUpSharedClass(cls):
+                log.append("setUpShared(%s)" %(cls.database, ))
+                if fail:
+                    raise ValueError("setup failed")
+                return {"server": "server-%s" %(cls.database, )}
+
+            @classmethod
+            def tearDownSharedClass(cls):
+                log.append("tearDownShared(%s)" %(cls.server, ))
+
+            @classmethod
+            def setUpClass(cls):
+                log.append("setUpClass(%s, %s)" %(cls.__name__, cls.server))
+
+            def test_method(self):
+                pass
+
+        parameterized_class(("database", "user"), [
+            ("postgres", "alice"),
+            ("postgres", "bob"),
+            ("sqlite", "alice"),
+        ], shared_setup_attrs="database")(Base)
+        result = unittest.TestResult()
+        unittest.defaultTestLoader.loadTestsFromModule(self.module).run(result)
+        return result
+
+    def test_setup_is_shared_by_each_group(self):
+        result = self.run_classes()
+        assert_equal((result.testsRun, result.errors), (3, []))
+        assert_equal(self.log, [
+            "setUpShared(postgres)",
+            "setUpClass(Base_0_postgres, server-postgres)",
+            "setUpClass(Base_1_postgres, server-postgres)",
+            "tearDownShared(server-postgres)",
+            "setUpShared(sqlite)",
+            "setUpClass(Base_2_sqlite, server-sqlite)",
+            "tearDownShared(server-sqlite)",
+        ])
+
+    def test_failed_setup_is_not_retried(self):
+        result = self.run_classes(fail=True)
+        assert_equal(len(result.errors), 3)
+        assert_contains(result.errors[1][1], "setup failed")
+        assert_equal(self.log, ["setUpShared(postgres)", "setUpShared(sqlite)"])
+
+    def test_shared_setup_methods_are_required(self):
+        class Base(TestCase):
+            __module__ = self.module.__name__
+
+        decorator = parameterized_class(("a", ), [(1, )], shared_setup_attrs=("a", ))
+        self.assertRaises(TypeError, decorator, Base)
+
+
+def test_lazy_parameterized_class_access_paths():
+    module = type(sys)("parameterized_lazy_class_paths")
+    sys.modules[module.__name__] = module
+    try:
+        class Base(TestCase):
+            __module__ = module.__name__
+
+            def test_method(self):
+                pass
+
+        parameterized_class(("a", ), [(1, ), (2, ), (3, )], lazy=True)(Base)
+        created = lambda: sorted(name for name in vars(module) if name.startswith("Base_"))
+        loader = unittest.TestLoader()
+
+        # Listing the module's names doesn't create the classes.
+        assert_equal(len([name for name in dir(module) if name.startswith("Base_")]), 3)
+        assert_equal(created(), [])
+
+        # Selecting a class (or test) by name only creates that class.
+        loader.loadTestsFromName("Base_1.test_method", module)
+        assert_equal(created(), ["Base_1"])
+
+        # Loading the module's tests creates every class, even when only
+        # some of them are selected (as with `-k`).
+        loader.testNamePatterns = ["*Base_2*"]
+        assert_equal(loader.loadTestsFromModule(module).countTestCases(), 1)
+        assert_equal(created(), ["Base_0", "Base_1", "Base_2"])
+    finally:
+        del sys.modules[module.__name__]
+
+
 @parameterized_class([
     {"foo": 42},
     {"bar": "some stuff"},
@@ -671,6 +2147,69 @@ class TestUnicodeDocstring(object):
         """ Это док-стринг, содержащий не-ascii символы """
         pass
 
+class TestAsyncRowBatch(TestCase):
+    expect([
+        "test_async_batch(1)",
+        "test_async_batch(2)",
+        "test_async_batch(3)",
+        "test_async_batch(4)",
+    ])
+
+    @parameterized.expand([(1, ), (2, ), (3, ), (4, )], async_concurrency=2)
+    async def test_async_batch(self, num):
+        await asyncio.sleep(0.01)
+        missing_tests.remove("test_async_batch(%r)" %(num, ))
+
+    def test_async_batch_ran_concurrently(self):
+        running = []
+        max_running = []
+
+        class TestRows(TestCase):
+            @parameterized.expand([(1, ), (2, ), (3, ), (4, )], async_concurrency=2)
+            async def test_row(self, num):
+                running.append(num)
+                max_running.append(len(running))
+                await asyncio.sleep(0.01)
+                running.remove(num)
+
+        result = unittest.TestResult()
+        for test in unittest.defaultTestLoader.loadTestsFromTestCase(TestRows):
+            test.run(result)
+        assert_equal(result.testsRun, 4)
+        assert result.wasSuccessful(), result.errors + result.failures
+        assert_equal(max(max_running), 2)
+
+
+def test_async_batch_reports_rows_individually():
+    class TestRows(TestCase):
+        @parameterized.expand(["pass", "fail", "skip"], async_concurrency=3)
+        async def test_row(self, outcome):
+            if outcome == "fail":
+                raise AssertionError("fail")
+            if outcome == "skip":
+                raise SkipTest("skip")
+
+    result = unittest.TestResult()
+    unittest.defaultTestLoader.loadTestsFromTestCase(TestRows).run(result)
+    assert_equal(result.testsRun, 3)
+    assert_equal(
+        [test.id().rpartition(".")[2] for (test, _) in result.failures],
+        ["test_row_1_fail"],
+    )
+    assert_equal(
+        [test.id().rpartition(".")[2] for (test, _) in result.skipped],
+        ["test_row_2_skip"],
+    )
+
+
+def test_async_concurrency_requires_a_coroutine_function():
+    assert_raises(
+        TypeError,
+        parameterized.expand([(1, )], async_concurrency=2, namespace={}),
+        lambda self, num: None,
+    )
+
+
 if sys.version_info.major == 3 and sys.version_info.minor >= 8:
     from unittest import IsolatedAsyncioTestCase
 